@@ -9,6 +9,7 @@ import argparse
 import os
 import sys
 import logging
+from itertools import chain
 from typing import Dict, List, Optional, Set, Tuple
 
 from . import git
@@ -23,8 +24,13 @@ logging.basicConfig(
 )
 
 
-def parse_args():
-    """Parse command-line arguments."""
+def parse_args(argv: Optional[List[str]] = None):
+    """
+    Parse command-line arguments.
+
+    Args:
+        argv (Optional[List[str]]): Arguments to parse, without the program name. Defaults to sys.argv[1:]
+    """
     parser = argparse.ArgumentParser(
         description="JADE: Java Analyzer for Detecting Effects",
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -46,8 +52,16 @@ def parse_args():
     parser.add_argument("--test-dir", help="Test directory (default: src/test/java)")
     parser.add_argument("--build-tool", default="maven", choices=["maven", "gradle", "java"],
                         help="Build tool (maven, gradle, java)")
+    parser.add_argument("--in-process-tests", action="store_true",
+                        help="Run Maven tests in the Maven JVM instead of forking one (faster, skips argLine)")
+
+    # Cache options
+    parser.add_argument("--cache-dir",
+                        help="Directory for the parse, analysis and test mapping caches (default: ~/.cache/jade)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Do not read or write the caches kept between runs")
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def get_comparison_commits(args) -> Tuple[str, str]:
@@ -67,8 +81,7 @@ def get_comparison_commits(args) -> Tuple[str, str]:
 
     # Case 2: Two branches specified (compare the HEADs of two branches)
     if args.branch and len(args.branch) == 2:
-        base_commit = git.get_branch_head(args.branch[0])
-        target_commit = git.get_branch_head(args.branch[1])
+        base_commit, target_commit = git.resolve_refs(args.branch[0], args.branch[1])
         return base_commit, target_commit
 
     # Case 3: One branch specified (compare HEAD to the HEAD of another branch)
@@ -98,7 +111,8 @@ def get_comparison_commits(args) -> Tuple[str, str]:
     return base_commit, target_commit
 
 
-def get_changed_methods(base_commit: str, target_commit: str, project_dir: str) -> List[str]:
+def get_changed_methods(base_commit: str, target_commit: str, project_dir: str,
+                        use_cache: bool = True, cache_dir: Optional[str] = None) -> List[str]:
     """
     Get the list of methods that have changed between two commits.
 
@@ -106,19 +120,18 @@ def get_changed_methods(base_commit: str, target_commit: str, project_dir: str)
         base_commit (str): Base commit hash
         target_commit (str): Target commit hash
         project_dir (str): Java project directory
+        use_cache (bool): Whether to reuse parse trees and results of earlier runs and keep new ones
+        cache_dir (Optional[str]): Directory of the caches (default: the java_parser defaults)
 
     Returns:
         List[str]: List of fully qualified method names that have changed
     """
     try:
-        # Get the diff between the two commits
-        diff_output = git.get_git_diff(base_commit, target_commit)
-
-        # Get the list of affected files
-        affected_files = git.get_affected_files(base_commit, target_commit)
+        # Stream the diff between the two commits and collect the impacted lines of every file in one pass
+        hunks = java_parser.parse_all_hunks(git.iter_git_diff(base_commit, target_commit))
 
-        # Filter for Java files only
-        java_files = [f for f in affected_files if f.endswith(".java")]
+        # The diff is already limited to added, modified and renamed Java files by git
+        java_files = list(hunks)
 
         if not java_files:
             logging.warning("No Java files were changed between the commits.")
@@ -132,8 +145,17 @@ def get_changed_methods(base_commit: str, target_commit: str, project_dir: str)
             # Log the files being analyzed
             logging.debug(f"Files analyzed: {', '.join(full_paths)}")
 
-            # Parse the impacted objects and methods
-            impacted_data = java_parser.parse_impacted_objects_and_methods(diff_output, full_paths)
+            # Parse the impacted objects and methods, reusing trees and results from earlier runs
+            if use_cache:
+                java_parser.enable_analysis_cache(os.path.join(cache_dir, "analysis.sqlite") if cache_dir else None)
+                java_parser.load_tree_cache(os.path.join(cache_dir, "ast") if cache_dir else None)
+            # Read each file as it is at the target commit, which the working tree may not match
+            repo_paths = dict(zip(full_paths, java_files))
+            with git.BatchCat() as blobs:
+                impacted_data = java_parser.parse_impacted_objects_and_methods(
+                    hunks, full_paths, reader=lambda path: blobs.read(target_commit, repo_paths[path])
+                )
+            java_parser.save_tree_cache()
 
             # Log the impacted data for debugging
             logging.debug(f"Impacted data: {impacted_data}")
@@ -197,7 +219,9 @@ def main():
             return 1
 
         # Get the list of methods that have changed
-        changed_methods = get_changed_methods(base_commit, target_commit, args.project_dir)
+        changed_methods = get_changed_methods(
+            base_commit, target_commit, args.project_dir, use_cache=not args.no_cache, cache_dir=args.cache_dir
+        )
         if not changed_methods:
             logging.warning("No changed methods were identified.")
 
@@ -210,15 +234,26 @@ def main():
                 test_dir = os.path.join(args.project_dir, "test")
 
         # Analyze the tests
+        if args.no_cache:
+            mapping_cache_file = None
+        elif args.cache_dir:
+            mapping_cache_file = os.path.join(args.cache_dir, "test_mapping.json")
+        else:
+            mapping_cache_file = java_test_analyzer.DEFAULT_MAPPING_CACHE_FILE
         try:
-            analyzer = java_test_analyzer.analyze_java_tests(test_dir, args.output_file)
+            analyzer = java_test_analyzer.analyze_java_tests(test_dir, args.output_file, cache_file=mapping_cache_file)
         except Exception as e:
             logging.error(f"Error analyzing tests: {e}")
             return 1
 
-        # Identify impacted tests
+        # Identify impacted tests, looking them up per changed method only when they are shown that way
         try:
-            impacted_tests = java_test_analyzer.identify_impacted_tests(analyzer, changed_methods)
+            if args.tests_only:
+                impacted_tests = None
+                all_tests = analyzer.get_impacted_tests_union(changed_methods)
+            else:
+                impacted_tests = java_test_analyzer.identify_impacted_tests(analyzer, changed_methods)
+                all_tests = set(chain.from_iterable(impacted_tests.values()))
         except Exception as e:
             logging.error(f"Error identifying impacted tests: {e}")
             return 1
@@ -226,10 +261,6 @@ def main():
         # Display the results
         if args.tests_only:
             # Only show the impacted tests
-            all_tests = set()
-            for tests in impacted_tests.values():
-                all_tests.update(tests)
-
             if all_tests:
                 logging.info("\nImpacted tests:")
                 for test in sorted(all_tests):
@@ -242,20 +273,21 @@ def main():
                 logging.info("\nChanged methods and impacted tests:")
                 for method, tests in impacted_tests.items():
                     logging.info(f"\n{method}:")
-                    for test in tests:
+                    for test in sorted(tests):
                         logging.info(f"  {test}")
             else:
                 logging.warning("No impacted tests were identified.")
 
         # Run the tests if requested
         if args.run_tests:
-            if not any(tests for tests in impacted_tests.values()):
+            if not all_tests:
                 logging.warning("No tests to run.")
             else:
                 logging.info("\nRunning impacted tests...")
                 try:
-                    results = java_test_runner.run_impacted_tests_from_analyzer_output(
-                        args.project_dir, impacted_tests, test_dir, args.build_tool
+                    results = java_test_runner.run_impacted_tests(
+                        args.project_dir, sorted(all_tests), test_dir, args.build_tool,
+                        in_process=args.in_process_tests
                     )
 
                     # Display the test results
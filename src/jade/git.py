@@ -1,4 +1,11 @@
 import subprocess
+import tempfile
+from typing import Iterator
+
+
+def _decode(output: bytes) -> str:
+    """Decode git output at the boundary where text is actually needed."""
+    return output.decode("utf-8", errors="replace")
 
 
 def get_previous_commit(n: int = 1) -> str:
@@ -12,12 +19,12 @@ def get_previous_commit(n: int = 1) -> str:
         str: The commit hash
     """
     cmd = ["git", "rev-parse", f"HEAD~{n}"]
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = subprocess.run(cmd, capture_output=True)
 
     if result.returncode != 0:
-        raise RuntimeError(f"Git rev-parse failed: {result.stderr.strip()}")
+        raise RuntimeError(f"Git rev-parse failed: {_decode(result.stderr).strip()}")
 
-    return result.stdout.strip()
+    return _decode(result.stdout).strip()
 
 
 def get_branch_head(branch: str) -> str:
@@ -31,37 +38,149 @@ def get_branch_head(branch: str) -> str:
         str: The commit hash of the branch HEAD
     """
     cmd = ["git", "rev-parse", branch]
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = subprocess.run(cmd, capture_output=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"Git rev-parse failed: {_decode(result.stderr).strip()}")
+
+    return _decode(result.stdout).strip()
+
+
+def resolve_refs(*refs: str) -> list[str]:
+    """
+    Resolve several refs to commit hashes with a single git invocation.
+
+    Args:
+        *refs (str): Branch names, tags, commit hashes or revision expressions
+
+    Returns:
+        list[str]: The commit hashes, in the same order as `refs`
+    """
+    cmd = ["git", "rev-parse", *refs]
+    result = subprocess.run(cmd, capture_output=True)
 
     if result.returncode != 0:
-        raise RuntimeError(f"Git rev-parse failed: {result.stderr.strip()}")
+        raise RuntimeError(f"Git rev-parse failed: {_decode(result.stderr).strip()}")
 
-    return result.stdout.strip()
+    return _decode(result.stdout).split()
 
 
 def get_affected_files(base_commit: str, target_commit: str = "HEAD") -> list[str]:
-    cmd = ["git", "diff", "--name-only", base_commit, target_commit]
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    """
+    List the Java files added, modified or renamed between two commits.
+
+    Args:
+        base_commit (str): Base commit hash
+        target_commit (str): Target commit hash. Default is HEAD.
+
+    Returns:
+        list[str]: Paths of the changed Java files
+    """
+    cmd = ["git", "diff", "--name-only", "--diff-filter=AMR", base_commit, target_commit, "--", "*.java"]
+    result = subprocess.run(cmd, capture_output=True)
 
     if result.returncode != 0:
-        raise RuntimeError(f"Git diff failed: {result.stderr.strip()}")
+        raise RuntimeError(f"Git diff failed: {_decode(result.stderr).strip()}")
 
-    return result.stdout.strip().splitlines()
+    return _decode(result.stdout).strip().splitlines()
 
 
-def get_git_diff(base_commit: str, target_commit: str = "HEAD") -> str:
-    cmd = [
+def _git_diff_cmd(base_commit: str, target_commit: str) -> list[str]:
+    return [
         "git",
         "-c", "diff.algorithm=histogram",
         "-c", "core.pager=",
         "diff",
         "-U0",
         "--no-color",
+        "--no-renames",
         "--ignore-all-space",
+        "--diff-filter=AMR",
         base_commit,
         target_commit,
+        "--",
+        "*.java",
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
+
+
+def get_git_diff(base_commit: str, target_commit: str = "HEAD") -> bytes:
+    cmd = _git_diff_cmd(base_commit, target_commit)
+    result = subprocess.run(cmd, capture_output=True)
     if result.returncode != 0:
-        raise RuntimeError(f"Git diff failed: {result.stderr.strip()}")
+        raise RuntimeError(f"Git diff failed: {_decode(result.stderr).strip()}")
     return result.stdout
+
+
+def iter_git_diff(base_commit: str, target_commit: str = "HEAD") -> Iterator[bytes]:
+    """
+    Stream the diff between two commits line by line as git produces it.
+
+    Unlike `get_git_diff`, the full output is never held in memory, so parsing can overlap with git.
+    Lines are left undecoded; only the parts the caller actually needs as text should be decoded.
+
+    Args:
+        base_commit (str): Base commit hash
+        target_commit (str): Target commit hash. Default is HEAD.
+
+    Yields:
+        bytes: Each line of the unified diff, including its trailing newline
+    """
+    cmd = _git_diff_cmd(base_commit, target_commit)
+    # stderr goes to a file rather than a second pipe: git blocks once a pipe is full, and with stdout being
+    # read to the end first, enough warnings on an unread stderr pipe would deadlock both processes
+    with tempfile.TemporaryFile() as stderr, subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr) as proc:
+        yield from proc.stdout
+        if proc.wait() != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"Git diff failed: {_decode(stderr.read()).strip()}")
+
+
+class BatchCat:
+    """
+    Read file contents at a given commit through one long-lived `git cat-file --batch` process.
+
+    Reading blobs from git rather than the working tree gives the exact content of the compared commit, and a
+    single process avoids paying git's startup cost for every file. Use as a context manager, or call `close`.
+    """
+
+    def __init__(self):
+        self._proc = subprocess.Popen(["git", "cat-file", "--batch"], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def read(self, rev: str, path: str) -> bytes:
+        """
+        Read a file as it is at a commit.
+
+        Args:
+            rev (str): Commit hash, branch name or other revision
+            path (str): Path of the file relative to the repository root
+
+        Returns:
+            bytes: The file's content
+        """
+        self._proc.stdin.write(f"{rev}:{path}\n".encode())
+        self._proc.stdin.flush()
+
+        # `<object name> <type> <size>`, or `<object> missing` if there is no such file
+        header = self._proc.stdout.readline()
+        parts = header.split()
+        if len(parts) != 3:
+            reason = _decode(header).strip() or "git cat-file exited"
+            raise RuntimeError(f"Git cat-file failed: {reason}")
+
+        # The content is followed by a newline that is not part of the blob
+        return self._proc.stdout.read(int(parts[2]) + 1)[:-1]
+
+    def close(self) -> None:
+        """Stop the git process."""
+        if self._proc.stdin:
+            self._proc.stdin.close()
+        self._proc.wait()
+        if self._proc.stdout:
+            self._proc.stdout.close()
+
+    def __enter__(self) -> "BatchCat":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
@@ -12,10 +12,44 @@ The approach uses Abstract Syntax Tree (AST) traversal to:
 """
 
 import os
+import json
 import logging
+import mmap
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import javalang
 from typing import Dict, List, Set, Tuple, Optional, Any
 
+DEFAULT_MAPPING_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "jade", "test_mapping.json")
+
+# Bump whenever the tests extracted from a file can change for the same file content, or the cache's keys change,
+# so entries written by older versions are never reused
+_MAPPING_CACHE_VERSION = 4
+
+# Test file names: "Test" or "test" anywhere before the .java extension, but not starting with "NotA"
+_TEST_FILE_RE = re.compile(r"(?!NotA).*[Tt]est.*\.java\Z", re.DOTALL)
+
+# Build output directories and the build files that produce them: a directory of this name next to one of those
+# files holds compiled classes and copied or generated sources, never the project's own tests
+_BUILD_OUTPUT_DIRS = {
+    "target": ("pom.xml",),
+    "build": ("build.gradle", "build.gradle.kts"),
+}
+
+# What `_is_test_method` looks for: a @Test annotation or a name starting with "test"
+_TEST_MARKER_RE = re.compile(rb"@\s*Test\b|\btest")
+
+# Attributes holding nested statements on objects that are not javalang nodes, in reverse visiting order
+_NESTED_STATEMENT_ATTRS = (
+    "finally_block", "catches", "else_statement", "then_statement", "block", "children",
+)
+
+# Below this many files to parse, the cost of starting worker processes outweighs the parallel speedup
+_PARALLEL_MIN_FILES = 8
+
 
 class JavaTestAnalyzer:
     """
@@ -23,16 +57,28 @@ class JavaTestAnalyzer:
     between tests and the methods they invoke.
     """
 
-    def __init__(self, test_dir: str):
+    def __init__(self, test_dir: str, cache_file: Optional[str] = None):
         """
         Initialize the JavaTestAnalyzer.
 
         Args:
             test_dir (str): Directory containing Java test files
+            cache_file (Optional[str]): File in which to keep the tests extracted from each test file between
+                runs, so only files that changed since are parsed again. Disabled if None.
         """
         self.test_dir = test_dir
+        self.cache_file = cache_file
         self.test_to_methods_map: Dict[str, Set[str]] = {}
-        self.method_to_tests_map: Dict[str, Set[str]] = {}
+        self.method_to_tests_map: Dict[str, Set[str]] = defaultdict(set)
+        # Test file path -> the tests it contributed to the mappings, so they can be replaced when it changes
+        self._file_to_tests: Dict[str, Set[str]] = {}
+        # Absolute file path -> (mtime_ns, size, [(test name, method calls)]) for the file's content when it was
+        # parsed. Absolute, as the cache file is shared by every project and test directory jade runs on
+        self._file_cache: Dict[str, Tuple[int, int, List[Tuple[str, List[str]]]]] = {}
+        self._file_cache_changed = False
+        self._file_cache_loaded = False
+        # Method name -> tests calling it through a variable, `this` or no qualifier at all; built on first use
+        self._suffix_index: Optional[Dict[str, Set[str]]] = None
 
     def build_test_method_mapping(self) -> None:
         """
@@ -41,13 +87,109 @@ class JavaTestAnalyzer:
         This method scans all Java test files in the test directory, parses them,
         and creates bidirectional mappings between tests and methods.
         """
-        for root, _, files in os.walk(self.test_dir):
-            for file in files:
-                # Only process files that end with .java and have "Test" or "test" in the name
-                # but exclude files that start with "NotA" to avoid processing files like "NotATest.java"
-                if file.endswith(".java") and ("Test" in file or "test" in file) and not file.startswith("NotA"):
-                    file_path = os.path.join(root, file)
-                    self._process_test_file(file_path)
+        if self.cache_file is not None:
+            self._load_file_cache()
+
+        # The cache is keyed on each file's stat, which the scan takes while it has the directory entry at hand
+        test_files = _scan_test_files(self.test_dir, with_stat=self.cache_file is not None)
+
+        if len(test_files) <= _PARALLEL_MIN_FILES:
+            for file_path, stat in test_files:
+                self._process_test_file(file_path, stat)
+        else:
+            self._process_test_files_in_parallel(test_files)
+
+        if self.cache_file is not None:
+            # Drop entries for test files under the scanned directory that no longer exist, keeping those of
+            # other directories and projects
+            test_dir = os.path.join(os.path.abspath(self.test_dir), "")
+            scanned_paths = {os.path.abspath(file_path) for file_path, _ in test_files}
+            stale_paths = [
+                path for path in self._file_cache if path.startswith(test_dir) and path not in scanned_paths
+            ]
+            if stale_paths:
+                for path in stale_paths:
+                    del self._file_cache[path]
+                self._file_cache_changed = True
+            if self._file_cache_changed:
+                self._save_file_cache()
+
+    def update_test_method_mapping(self, changed_paths: List[str]) -> None:
+        """
+        Update the mappings built by `build_test_method_mapping` for test files that changed since.
+
+        The tests of each changed file are removed from both mappings and the file is processed again,
+        unless it no longer exists. Paths that are not test files are ignored, so all changed files of a diff
+        can be passed.
+
+        Args:
+            changed_paths (List[str]): Paths of the added, modified or deleted files
+        """
+        # Never save a cache holding only the changed files over the one of a full build
+        if self.cache_file is not None and not self._file_cache_loaded:
+            self._load_file_cache()
+
+        for file_path in changed_paths:
+            if not _is_test_file(os.path.basename(file_path)):
+                continue
+
+            self._remove_tests(file_path)
+            if os.path.exists(file_path):
+                self._process_test_file(file_path)
+            elif self._file_cache.pop(os.path.abspath(file_path), None) is not None:
+                self._file_cache_changed = True
+
+        if self.cache_file is not None and self._file_cache_changed:
+            self._save_file_cache()
+
+    def _remove_tests(self, file_path: str) -> None:
+        """
+        Remove the tests of one test file from the mappings.
+
+        Args:
+            file_path (str): Path to the Java test file
+        """
+        self._suffix_index = None
+        method_to_tests_map = self.method_to_tests_map
+        for test_method_name in self._file_to_tests.pop(file_path, ()):
+            for method_call in self.test_to_methods_map.pop(test_method_name, ()):
+                tests = method_to_tests_map.get(method_call)
+                if tests is not None:
+                    tests.discard(test_method_name)
+                    if not tests:
+                        del method_to_tests_map[method_call]
+
+    def _load_file_cache(self) -> None:
+        """Load the tests extracted by earlier runs from the cache file, if it exists and is current."""
+        self._file_cache = {}
+        self._file_cache_changed = False
+        self._file_cache_loaded = True
+        try:
+            # Plain JSON, so a cache in a shared directory can at worst give wrong tests, never run code
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logging.warning(f"Could not load test mapping cache {self.cache_file}: {e}")
+            return
+
+        if (isinstance(cached, dict) and cached.get("version") == [_MAPPING_CACHE_VERSION, javalang.__version__]
+                and isinstance(cached.get("files"), dict)):
+            self._file_cache = cached["files"]
+
+    def _save_file_cache(self) -> None:
+        """Write the tests extracted from each test file to the cache file."""
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({"version": [_MAPPING_CACHE_VERSION, javalang.__version__], "files": self._file_cache}, f)
+            # Replace atomically so concurrent runs never read a partially written cache
+            os.replace(tmp_file, self.cache_file)
+            self._file_cache_changed = False
+        except Exception as e:
+            logging.warning(f"Could not save test mapping cache {self.cache_file}: {e}")
 
     def _is_test_method(self, node: javalang.tree.MethodDeclaration) -> bool:
         """
@@ -75,55 +217,199 @@ class JavaTestAnalyzer:
 
         return False
 
-    def _process_test_file(self, file_path: str) -> None:
+    def _process_test_file(self, file_path: str, stat: Optional[os.stat_result] = None) -> None:
         """
         Process a single Java test file to extract test methods and their invocations.
 
         Args:
             file_path (str): Path to the Java test file
+            stat (Optional[os.stat_result]): The file's stat if already known
+        """
+        try:
+            cached_tests, stat = self._lookup_file_cache(file_path, stat)
+        except OSError as e:
+            logging.error(f"Error reading file {file_path}: {e}")
+            return
+
+        if cached_tests is not None:
+            self._add_tests(file_path, cached_tests)
+        else:
+            self._store_tests(file_path, stat, self._extract_tests(file_path))
+
+    def _process_test_files_in_parallel(self, test_files: List[Tuple[str, Optional[os.stat_result]]]) -> None:
+        """
+        Process Java test files, parsing the ones not in the cache in a process pool.
+
+        Parsing is CPU-bound pure Python and each file is independent, so worker processes scale where
+        threads would not. Results are added to the mappings in the order of `test_files`.
+
+        Args:
+            test_files (List[Tuple[str, Optional[os.stat_result]]]): Paths to the Java test files, with their
+                stat if already known
+        """
+        # (file path, stat for the cache, cached tests or None if the file must be parsed)
+        entries = []
+        for file_path, stat in test_files:
+            try:
+                cached_tests, stat = self._lookup_file_cache(file_path, stat)
+            except OSError as e:
+                logging.error(f"Error reading file {file_path}: {e}")
+                continue
+            entries.append((file_path, stat, cached_tests))
+
+        to_parse = [file_path for file_path, _, cached_tests in entries if cached_tests is None]
+        parsed = {}
+        if to_parse:
+            workers = min(len(to_parse), os.cpu_count() or 1)
+            # Hand files out in batches to amortize IPC, leaving several batches per worker for balance
+            chunksize = max(1, len(to_parse) // (workers * 4))
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    parsed = dict(zip(to_parse, executor.map(_extract_tests_in_worker, to_parse, chunksize=chunksize)))
+            except (OSError, NotImplementedError, BrokenProcessPool) as e:
+                logging.warning(f"Could not parse test files in parallel, falling back to serial parsing: {e}")
+                parsed = {file_path: self._extract_tests(file_path) for file_path in to_parse}
+
+        for file_path, stat, cached_tests in entries:
+            if cached_tests is not None:
+                self._add_tests(file_path, cached_tests)
+            else:
+                self._store_tests(file_path, stat, parsed[file_path])
+
+    def _lookup_file_cache(
+        self, file_path: str, stat: Optional[os.stat_result] = None
+    ) -> Tuple[Optional[List[Tuple[str, List[str]]]], Optional[os.stat_result]]:
+        """
+        Look up the tests extracted from a test file by an earlier run.
+
+        Args:
+            file_path (str): Path to the Java test file
+            stat (Optional[os.stat_result]): The file's stat if already known, else the file is stat'ed
+
+        Returns:
+            Tuple: The cached tests if the file still has the modification time and size it had when they were
+                extracted (else None), and the file's stat to store new results under (None if caching is disabled)
+
+        Raises:
+            OSError: If caching is enabled and the file cannot be stat'ed
+        """
+        if self.cache_file is None:
+            return None, None
+
+        if stat is None:
+            stat = os.stat(file_path)
+        cached = self._file_cache.get(os.path.abspath(file_path))
+        if (isinstance(cached, list) and len(cached) == 3
+                and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size):
+            return cached[2], stat
+        return None, stat
+
+    def _store_tests(
+        self, file_path: str, stat: Optional[os.stat_result], tests: Optional[List[Tuple[str, List[str]]]]
+    ) -> None:
+        """
+        Add the tests freshly extracted from a test file to the mappings and the cache.
+
+        Args:
+            file_path (str): Path to the Java test file
+            stat (Optional[os.stat_result]): The file's stat from `_lookup_file_cache`, or None to not cache the tests
+            tests (Optional[List[Tuple[str, List[str]]]]): The output of `_extract_tests` for the file
+        """
+        if tests is None:
+            return
+
+        if stat is not None:
+            self._file_cache[os.path.abspath(file_path)] = (stat.st_mtime_ns, stat.st_size, tests)
+            self._file_cache_changed = True
+        self._add_tests(file_path, tests)
+
+    def _add_tests(self, file_path: str, tests: List[Tuple[str, List[str]]]) -> None:
+        """
+        Add the tests of one file to the mappings.
+
+        Args:
+            file_path (str): Path to the Java test file
+            tests (List[Tuple[str, List[str]]]): Fully qualified test method names and the method calls they make
+        """
+        # Names are interned so each distinct test and method name is stored once across both maps,
+        # however many files, cache entries or worker processes it came from
+        intern = sys.intern
+        self._suffix_index = None
+        method_to_tests_map = self.method_to_tests_map
+        file_tests = self._file_to_tests.setdefault(file_path, set())
+        for test_method_name, method_calls in tests:
+            test_method_name = intern(test_method_name)
+            file_tests.add(test_method_name)
+
+            # Update the mappings
+            method_calls = {intern(method_call) for method_call in method_calls}
+            self.test_to_methods_map[test_method_name] = method_calls
+
+            # Update the reverse mapping
+            for method_call in method_calls:
+                method_to_tests_map[method_call].add(test_method_name)
+
+    def _extract_tests(self, file_path: str) -> Optional[List[Tuple[str, List[str]]]]:
+        """
+        Parse a single Java test file and extract its test methods and their invocations.
+
+        Args:
+            file_path (str): Path to the Java test file
+
+        Returns:
+            Optional[List[Tuple[str, List[str]]]]: Fully qualified test method names and the method calls they make,
+                or None if the file could not be read or parsed
         """
         try:
             # Read the file content
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = _read_test_source(file_path)
             except Exception as e:
                 logging.error(f"Error reading file {file_path}: {e}")
-                return
+                return None
+            if content is None:
+                # Neither a @Test annotation nor a test* name, so there is nothing to parse for
+                return []
 
             # Parse the Java file
             try:
                 tree = javalang.parse.parse(content)
             except Exception as e:
                 logging.error(f"Error parsing Java file {file_path}: {e}")
-                # Try to provide more detailed information about the parsing error
-                try:
-                    # Split the content into lines
-                    lines = content.splitlines()
-
-                    # Attempt to parse small chunks to identify where the parsing fails
-                    chunk_size = 10  # Start with small chunks
-                    for i in range(0, len(lines), chunk_size):
-                        chunk = '\n'.join(lines[i:i+chunk_size])
-                        try:
-                            javalang.parse.parse(f"class Test {{ void test() {{ {chunk} }} }}")
-                        except Exception as chunk_error:
-                            logging.warning(f"Parsing error near line {i+1}-{i+chunk_size}: {chunk_error}")
-                            # Try to narrow down to the exact line
-                            for j in range(i, min(i+chunk_size, len(lines))):
-                                line = lines[j].strip()
-                                if line:  # Skip empty lines
-                                    try:
-                                        # Try to parse a simple class with just this line
-                                        test_code = f"class Test {{ void test() {{ {line} }} }}"
-                                        javalang.parse.parse(test_code)
-                                    except Exception:
-                                        logging.warning(f"Potential syntax error at line {j+1}: {line}")
-                            break
-                except Exception as detail_error:
-                    logging.warning(f"Could not provide detailed error information: {detail_error}")
-
-                return
+                # javalang reports the token it stopped at, which locates the error without any re-parsing
+                position = getattr(getattr(e, "at", None), "position", None)
+                if position is not None:
+                    logging.warning(f"Parsing error at line {position.line}, column {position.column}")
+
+                # Narrowing the error down by re-parsing the file in pieces costs a parse per line, so only on request
+                if os.environ.get("JADE_DEBUG_PARSE"):
+                    try:
+                        # Split the content into lines
+                        lines = content.splitlines()
+
+                        # Attempt to parse small chunks to identify where the parsing fails
+                        chunk_size = 10  # Start with small chunks
+                        for i in range(0, len(lines), chunk_size):
+                            chunk = '\n'.join(lines[i:i+chunk_size])
+                            try:
+                                javalang.parse.parse(f"class Test {{ void test() {{ {chunk} }} }}")
+                            except Exception as chunk_error:
+                                logging.warning(f"Parsing error near line {i+1}-{i+chunk_size}: {chunk_error}")
+                                # Try to narrow down to the exact line
+                                for j in range(i, min(i+chunk_size, len(lines))):
+                                    line = lines[j].strip()
+                                    if line:  # Skip empty lines
+                                        try:
+                                            # Try to parse a simple class with just this line
+                                            test_code = f"class Test {{ void test() {{ {line} }} }}"
+                                            javalang.parse.parse(test_code)
+                                        except Exception:
+                                            logging.warning(f"Potential syntax error at line {j+1}: {line}")
+                                break
+                    except Exception as detail_error:
+                        logging.warning(f"Could not provide detailed error information: {detail_error}")
+
+                return None
 
             # Extract the package name
             package_name = tree.package.name if tree.package else ""
@@ -133,6 +419,7 @@ class JavaTestAnalyzer:
             fully_qualified_class_name = f"{package_name}.{class_name}" if package_name else class_name
 
             # Find all test methods in the file
+            tests = []
             for _, node in tree.filter(javalang.tree.MethodDeclaration):
                 if self._is_test_method(node):
                     test_method_name = f"{fully_qualified_class_name}.{node.name}"
@@ -144,99 +431,140 @@ class JavaTestAnalyzer:
                         logging.error(f"Error extracting method calls from {test_method_name}: {e}")
                         continue
 
-                    # Update the mappings
-                    self.test_to_methods_map[test_method_name] = set(method_calls)
+                    tests.append((test_method_name, method_calls))
 
-                    # Update the reverse mapping
-                    for method_call in method_calls:
-                        if method_call not in self.method_to_tests_map:
-                            self.method_to_tests_map[method_call] = set()
-                        self.method_to_tests_map[method_call].add(test_method_name)
+            return tests
 
         except Exception as e:
             logging.error(f"Error processing test file {file_path}: {e}")
+            return None
 
     def _extract_method_calls(self, body: List[Any]) -> List[str]:
         """
         Extract method calls from a method body.
 
+        The body is walked once with an explicit stack: javalang nodes list every attribute in `children`,
+        so only that is followed for them, while other objects fall back to their statement attributes.
+
         Args:
             body (List[Any]): The body of the method (list of javalang.tree nodes)
 
         Returns:
-            List[str]: List of fully qualified method calls
+            List[str]: Fully qualified method calls, without duplicates, in the order they first appear
         """
-        method_calls = []
+        # Keyed on (qualifier, name): the tuple hashes from the two strings' cached hashes, so repeated calls
+        # such as assertEquals never build a joined name, which happens once per distinct call at the end
+        method_calls: Dict[Tuple[Optional[str], str], None] = {}
 
         if not body:
-            return method_calls
-
-        # Process each statement in the method body
-        for statement in body:
-            try:
-                # Handle method invocations
-                if isinstance(statement, javalang.tree.MethodInvocation):
-                    # Try to get the qualifier (class name) if available
-                    qualifier = ""
-                    if hasattr(statement, 'qualifier') and statement.qualifier:
-                        qualifier = statement.qualifier
-
-                    method_name = statement.member
-                    method_call = f"{qualifier}.{method_name}" if qualifier else method_name
-                    method_calls.append(method_call)
-
-                # Recursively process nested statements
-                if hasattr(statement, 'children'):
-                    method_calls.extend(self._extract_method_calls(statement.children))
-
-                # Process blocks (e.g., if, for, while statements)
-                if hasattr(statement, 'block') and statement.block:
-                    method_calls.extend(self._extract_method_calls(statement.block))
-
-                # Process then/else statements
-                if hasattr(statement, 'then_statement') and statement.then_statement:
-                    method_calls.extend(self._extract_method_calls([statement.then_statement]))
+            return []
+
+        invocation_type = javalang.tree.MethodInvocation
+        node_type = javalang.ast.Node
+        stack = [body]
+        while stack:
+            statement = stack.pop()
+            if isinstance(statement, (list, tuple)):
+                # Push in reverse so statements are visited in source order
+                stack.extend(reversed(statement))
+                continue
+            if statement is None or isinstance(statement, str):
+                continue
+
+            # Handle method invocations
+            if isinstance(statement, invocation_type):
+                # Try to get the qualifier (class name) if available
+                # javalang uses both "" and None for a missing qualifier
+                qualifier = getattr(statement, 'qualifier', None) or None
+                method_calls[(qualifier, statement.member)] = None
+
+            if isinstance(statement, node_type):
+                stack.extend(
+                    child for child in reversed(statement.children) if isinstance(child, (node_type, list, tuple))
+                )
+                continue
+
+            # Process nested statements, blocks (e.g. if, for, while statements) and try/catch blocks
+            for attr in _NESTED_STATEMENT_ATTRS:
+                nested = getattr(statement, attr, None)
+                if nested:
+                    stack.append(nested)
+
+        return [qualifier + "." + method_name if qualifier else method_name for qualifier, method_name in method_calls]
+
+    def get_impacted_tests(self, changed_methods: List[str]) -> Dict[str, Set[str]]:
+        """
+        Get tests impacted by changes to specific methods.
 
-                if hasattr(statement, 'else_statement') and statement.else_statement:
-                    method_calls.extend(self._extract_method_calls([statement.else_statement]))
+        Method calls are recorded as written in the tests, so besides the exact name a changed method
+        matches calls through its simple class name and calls of the same method name through a variable,
+        `this` or no qualifier, whose class is unknown.
 
-                # Process try/catch blocks
-                if hasattr(statement, 'try_block') and statement.try_block:
-                    method_calls.extend(self._extract_method_calls(statement.try_block))
+        Args:
+            changed_methods (List[str]): List of fully qualified method names that have changed
 
-                if hasattr(statement, 'catch_clauses') and statement.catch_clauses:
-                    for catch_clause in statement.catch_clauses:
-                        if hasattr(catch_clause, 'block') and catch_clause.block:
-                            method_calls.extend(self._extract_method_calls(catch_clause.block))
+        Returns:
+            Dict[str, Set[str]]: Dictionary mapping changed methods to sets of impacted tests
+        """
+        suffix_index = self._get_suffix_index()
+        return {method: self._find_impacted_tests(method, suffix_index) for method in changed_methods}
 
-                if hasattr(statement, 'finally_block') and statement.finally_block:
-                    method_calls.extend(self._extract_method_calls(statement.finally_block))
+    def get_impacted_tests_union(self, changed_methods: List[str]) -> Set[str]:
+        """
+        Get all tests impacted by changes to any of the given methods.
 
-            except Exception as e:
-                logging.warning(f"Error processing statement in method body: {e}")
-                # Continue processing other statements
+        Args:
+            changed_methods (List[str]): List of fully qualified method names that have changed
 
-        return method_calls
+        Returns:
+            Set[str]: Set of impacted tests
+        """
+        suffix_index = self._get_suffix_index()
+        return set().union(*(self._find_impacted_tests(method, suffix_index) for method in changed_methods))
 
-    def get_impacted_tests(self, changed_methods: List[str]) -> Dict[str, List[str]]:
+    def _find_impacted_tests(self, method: str, suffix_index: Dict[str, Set[str]]) -> Set[str]:
         """
-        Get tests impacted by changes to specific methods.
+        Get the tests whose recorded method calls may refer to a method.
 
         Args:
-            changed_methods (List[str]): List of fully qualified method names that have changed
+            method (str): Fully qualified method name
+            suffix_index (Dict[str, Set[str]]): Index from `_get_suffix_index`
 
         Returns:
-            Dict[str, List[str]]: Dictionary mapping changed methods to lists of impacted tests
+            Set[str]: Set of impacted tests
         """
-        result = {}
+        # .get rather than indexing, which would add every unknown method to the defaultdict
+        method_to_tests_map = self.method_to_tests_map
+        tests = set(method_to_tests_map.get(method, ()))
+
+        qualifier, _, member = method.rpartition(".")
+        if qualifier:
+            # Static calls name the class without its package, e.g. ClassA.method for com.example.ClassA.method
+            simple_name = qualifier.rpartition(".")[2]
+            tests.update(method_to_tests_map.get(f"{simple_name}.{member}", ()))
+        tests.update(suffix_index.get(member, ()))
+        return tests
+
+    def _get_suffix_index(self) -> Dict[str, Set[str]]:
+        """
+        Get the index from method name to the tests calling a method of that name on an unknown class.
 
-        for method in changed_methods:
-            if method in self.method_to_tests_map:
-                result[method] = list(self.method_to_tests_map[method])
-            else:
-                result[method] = []
+        Calls qualified by a class name (ClassA.method) are left out, as their class is known; calls through
+        a variable (calculator.add), `this` or no qualifier at all could be to any class.
 
-        return result
+        Returns:
+            Dict[str, Set[str]]: Dictionary mapping method names to sets of tests
+        """
+        if self._suffix_index is None:
+            intern = sys.intern
+            suffix_index: Dict[str, Set[str]] = {}
+            for method_call, tests in self.method_to_tests_map.items():
+                qualifier, _, member = method_call.rpartition(".")
+                if qualifier.rpartition(".")[2][:1].isupper():
+                    continue
+                suffix_index.setdefault(intern(member), set()).update(tests)
+            self._suffix_index = suffix_index
+        return self._suffix_index
 
     def get_test_coverage(self, test_name: str) -> List[str]:
         """
@@ -248,67 +576,191 @@ class JavaTestAnalyzer:
         Returns:
             List[str]: List of methods invoked by the test
         """
-        if test_name in self.test_to_methods_map:
-            return list(self.test_to_methods_map[test_name])
-        return []
+        # A fresh list, so callers cannot modify the mapping through it
+        return list(self.test_to_methods_map.get(test_name, ()))
 
     def save_mapping(self, output_file: str) -> None:
         """
-        Save the test-to-methods mapping to a file.
+        Save the test-to-methods mapping to a file, as a JSON object of test names to sorted method lists.
 
         Args:
             output_file (str): Path to the output file
         """
         with open(output_file, 'w') as f:
-            for test, methods in self.test_to_methods_map.items():
-                f.write(f"{test}:\n")
-                for method in methods:
-                    f.write(f"  - {method}\n")
+            json.dump({test: sorted(methods) for test, methods in self.test_to_methods_map.items()}, f)
 
     def load_mapping(self, input_file: str) -> None:
         """
         Load a previously saved test-to-methods mapping from a file.
 
+        Both the JSON format written by `save_mapping` and the older line-based format are accepted.
+
         Args:
             input_file (str): Path to the input file
         """
-        current_test = None
         self.test_to_methods_map = {}
-        self.method_to_tests_map = {}
+        self.method_to_tests_map = defaultdict(set)
+        self._file_to_tests = {}
+        self._suffix_index = None
 
         with open(input_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
+            content = f.read()
+
+        if content.lstrip().startswith("{"):
+            intern = sys.intern
+            self.test_to_methods_map = {
+                intern(test): {intern(method) for method in methods} for test, methods in json.loads(content).items()
+            }
+        else:
+            self._load_legacy_mapping(content)
+
+        # Rebuild the reverse mapping
+        method_to_tests_map = self.method_to_tests_map
+        for test, methods in self.test_to_methods_map.items():
+            for method in methods:
+                method_to_tests_map[method].add(test)
+
+    def _load_legacy_mapping(self, content: str) -> None:
+        """
+        Load a test-to-methods mapping saved in the line-based format of earlier versions.
+
+        Args:
+            content (str): The content of the mapping file
+        """
+        current_test = None
+        for line in content.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.endswith(":"):
+                # This is a test name
+                current_test = sys.intern(line.rstrip(":"))
+                self.test_to_methods_map[current_test] = set()
+            elif (line.startswith("  - ") or line.startswith("- ")) and current_test is not None:
+                # This is a method
+                method = sys.intern(line.lstrip("- ").strip())  # Remove the dash and any spaces
+                self.test_to_methods_map[current_test].add(method)
+
+
+def _is_test_file(file_name: str) -> bool:
+    """
+    Determine if a file is a Java test file from its name.
+
+    Only files that end with .java and have "Test" or "test" in the name are test files,
+    but files that start with "NotA" are excluded to avoid processing files like "NotATest.java".
 
-                if line.endswith(":"):
-                    # This is a test name
-                    current_test = line.rstrip(":")
-                    self.test_to_methods_map[current_test] = set()
-                elif (line.startswith("  - ") or line.startswith("- ")) and current_test is not None:
-                    # This is a method
-                    method = line.lstrip("- ").strip()  # Remove the dash and any spaces
-                    self.test_to_methods_map[current_test].add(method)
+    Args:
+        file_name (str): The file's base name
+
+    Returns:
+        bool: True if the file is a test file, False otherwise
+    """
+    return _TEST_FILE_RE.match(file_name) is not None
 
-                    # Update the reverse mapping
-                    if method not in self.method_to_tests_map:
-                        self.method_to_tests_map[method] = set()
-                    self.method_to_tests_map[method].add(current_test)
+
+def _scan_test_files(test_dir: str, with_stat: bool) -> List[Tuple[str, Optional[os.stat_result]]]:
+    """
+    Find the Java test files under a directory.
+
+    Directories are scanned with os.scandir, whose entries know their type without a stat call. Like
+    os.walk, symlinked directories are not followed and unreadable directories are skipped. Build output
+    directories (a target/ next to a pom.xml, a build/ next to a Gradle build file) are not scanned either.
+
+    Args:
+        test_dir (str): Directory containing Java test files
+        with_stat (bool): Whether to stat each test file
+
+    Returns:
+        List[Tuple[str, Optional[os.stat_result]]]: Paths to the test files, with their stat if requested,
+            each directory's files before those of its subdirectories
+    """
+    test_files = []
+    stack = [test_dir]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        names = {entry.name for entry in entries}
+        skipped = {
+            output_dir for output_dir, build_files in _BUILD_OUTPUT_DIRS.items()
+            if output_dir in names and not names.isdisjoint(build_files)
+        }
+
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # Hidden directories (.git, .idea, ...) cannot be Java packages, so skip their subtrees outright
+                    if not entry.name.startswith(".") and entry.name not in skipped:
+                        subdirs.append(entry.path)
+                elif _is_test_file(entry.name) and entry.is_file():
+                    test_files.append((entry.path, entry.stat() if with_stat else None))
+            except OSError:
+                # Removed or dangling since the directory was listed
+                continue
+        # Pushed in reverse so subdirectories are scanned in listing order
+        stack.extend(reversed(subdirs))
+
+    return test_files
+
+
+def _read_test_source(file_path: str) -> Optional[str]:
+    """
+    Read a Java test file, unless it cannot contain a test method.
+
+    The file is memory-mapped and screened for test markers before anything is decoded, so helper and base
+    classes that match the test file name pattern are never decoded or parsed.
+
+    Args:
+        file_path (str): Path to the Java test file
+
+    Returns:
+        Optional[str]: The file's content, or None if it has no test markers
+    """
+    try:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if not _TEST_MARKER_RE.search(mm):
+                return None
+            return str(mm, 'utf-8')
+    except (OSError, ValueError, TypeError):
+        # Empty files cannot be memory-mapped; read anything that could not be screened as text,
+        # which also reports the error if the file cannot be read at all
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+def _extract_tests_in_worker(file_path: str) -> Optional[List[Tuple[str, List[str]]]]:
+    """
+    Run `JavaTestAnalyzer._extract_tests` in a worker process.
+
+    Args:
+        file_path (str): Path to the Java test file
+
+    Returns:
+        Optional[List[Tuple[str, List[str]]]]: The tests of the file, or None if it could not be read or parsed
+    """
+    return JavaTestAnalyzer(os.path.dirname(file_path))._extract_tests(file_path)
 
 
-def analyze_java_tests(test_dir: str, output_file: Optional[str] = None) -> JavaTestAnalyzer:
+def analyze_java_tests(
+    test_dir: str, output_file: Optional[str] = None, cache_file: Optional[str] = None
+) -> JavaTestAnalyzer:
     """
     Analyze Java test files and build a mapping between tests and methods.
 
     Args:
         test_dir (str): Directory containing Java test files
         output_file (Optional[str]): Path to save the mapping (if provided)
+        cache_file (Optional[str]): File caching the tests of unchanged test files between runs (if provided)
 
     Returns:
         JavaTestAnalyzer: Initialized analyzer with built mappings
     """
-    analyzer = JavaTestAnalyzer(test_dir)
+    analyzer = JavaTestAnalyzer(test_dir, cache_file)
     analyzer.build_test_method_mapping()
 
     if output_file:
@@ -317,7 +769,7 @@ def analyze_java_tests(test_dir: str, output_file: Optional[str] = None) -> Java
     return analyzer
 
 
-def identify_impacted_tests(analyzer: JavaTestAnalyzer, changed_methods: List[str]) -> Dict[str, List[str]]:
+def identify_impacted_tests(analyzer: JavaTestAnalyzer, changed_methods: List[str]) -> Dict[str, Set[str]]:
     """
     Identify tests impacted by changes to specific methods.
 
@@ -326,6 +778,6 @@ def identify_impacted_tests(analyzer: JavaTestAnalyzer, changed_methods: List[st
         changed_methods (List[str]): List of fully qualified method names that have changed
 
     Returns:
-        Dict[str, List[str]]: Dictionary mapping changed methods to lists of impacted tests
+        Dict[str, Set[str]]: Dictionary mapping changed methods to sets of impacted tests
     """
     return analyzer.get_impacted_tests(changed_methods)
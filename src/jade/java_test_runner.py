@@ -17,8 +17,16 @@ import subprocess
 import re
 import shutil
 import logging
+import time
+import xml.etree.ElementTree as ET
 from typing import Dict, List, Set, Optional, Tuple, Union
 
+# Surefire's per-run summary, e.g. "Tests run: 3, Failures: 0, Errors: 0, Skipped: 0"
+_SUREFIRE_SUMMARY_RE = re.compile(r"Tests run: (\d+), Failures: (\d+), Errors: (\d+)")
+
+# Parameter list and invocation index after a reported test method name, e.g. "(int)[1]" (JUnit 5) or "[1]" (JUnit 4)
+_TEST_CASE_SUFFIX_RE = re.compile(r"[(\[].*", re.DOTALL)
+
 def run_subprocess(cmd: List[str], cwd: str, error_msg: str) -> Tuple[bool, str, str]:
     """
     Run a subprocess command and handle errors.
@@ -55,7 +63,8 @@ class JavaTestRunner:
     Runs Java tests that have been identified as impacted by code changes.
     """
 
-    def __init__(self, project_dir: str, test_dir: str = None, build_tool: str = "maven"):
+    def __init__(self, project_dir: str, test_dir: str = None, build_tool: str = "maven",
+                 junit_console_jar: Optional[str] = None, in_process: bool = False):
         """
         Initialize the JavaTestRunner.
 
@@ -65,9 +74,22 @@ class JavaTestRunner:
                                      will use standard Maven/Gradle test directory structure
             build_tool (str, optional): Build tool used by the project ('maven', 'gradle', or 'java')
                                        Use 'java' for projects without Maven or Gradle
+            junit_console_jar (str, optional): Path to junit-platform-console-standalone.jar. With the
+                                              'java' build tool, all methods of a class then run in a
+                                              single JVM. Defaults to the JADE_JUNIT_CONSOLE_JAR
+                                              environment variable
+            in_process (bool, optional): Run Maven tests inside the Maven JVM (-DforkCount=0) rather than a
+                                        forked one. Faster, but the build's argLine and forked-JVM setup
+                                        are not applied
         """
         self.project_dir = project_dir
         self.build_tool = build_tool.lower()
+        self.junit_console_jar = junit_console_jar or os.environ.get("JADE_JUNIT_CONSOLE_JAR")
+        self.in_process = in_process
+        # Set while run_impacted_tests runs, so compiled classes are shared between test classes
+        self._keep_temp_dir = False
+        # Java file name -> paths under test_dir, built on the first lookup outside the package layout
+        self._path_index: Optional[Dict[str, List[str]]] = None
 
         # If test_dir is not provided, use standard directory based on build tool
         if test_dir is None:
@@ -97,9 +119,57 @@ class JavaTestRunner:
         # Group tests by class to minimize test runs
         tests_by_class = self._group_tests_by_class(impacted_tests)
 
+        if self.build_tool in ("maven", "gradle"):
+            # One build tool invocation for every class, so JVM and dependency resolution startup is paid once
+            return self._run_test_classes(tests_by_class)
+
+        self._keep_temp_dir = True
+        try:
+            for class_name, methods in tests_by_class.items():
+                class_results = self._run_test_class(class_name, methods)
+                results.update(class_results)
+        finally:
+            self._keep_temp_dir = False
+            if self.build_tool == "java":
+                self._remove_temp_dir(os.path.join(self.project_dir, "temp_classes"))
+
+        return results
+
+    def _run_test_classes(self, tests_by_class: Dict[str, List[str]]) -> Dict[str, bool]:
+        """
+        Run tests from several classes in a single Maven or Gradle invocation.
+
+        Args:
+            tests_by_class (Dict[str, List[str]]): Dictionary mapping class names to lists of test methods
+
+        Returns:
+            Dict[str, bool]: Dictionary mapping test names to their pass/fail status
+        """
+        results = {}
+
+        runnable = {}
         for class_name, methods in tests_by_class.items():
-            class_results = self._run_test_class(class_name, methods)
-            results.update(class_results)
+            file_path = self._class_name_to_file_path(class_name)
+            if not file_path or not os.path.exists(file_path):
+                print(f"Warning: Could not find test file for class {class_name}")
+                for method in methods:
+                    results[f"{class_name}.{method}"] = False
+            else:
+                runnable[class_name] = methods
+
+        if not runnable:
+            return results
+
+        if self.build_tool == "maven":
+            cmd_results = self._run_maven_suite(runnable)
+        else:
+            cmd_results = self._run_gradle_suite(runnable)
+
+        for class_name, methods in runnable.items():
+            for method in methods:
+                test_name = f"{class_name}.{method}"
+                # If we couldn't find the result, assume failure
+                results[test_name] = cmd_results.get(test_name, False)
 
         return results
 
@@ -116,19 +186,13 @@ class JavaTestRunner:
         tests_by_class = {}
 
         for test_name in test_names:
-            # Split the test name into package, class, and method
-            parts = test_name.split(".")
-            if len(parts) < 2:
+            # The method is the last component, the fully qualified class everything before it
+            class_name, separator, method_name = test_name.rpartition(".")
+            if not separator:
                 print(f"Warning: Invalid test name format: {test_name}")
                 continue
 
-            method_name = parts[-1]
-            class_name = ".".join(parts[:-1])
-
-            if class_name not in tests_by_class:
-                tests_by_class[class_name] = []
-
-            tests_by_class[class_name].append(method_name)
+            tests_by_class.setdefault(class_name, []).append(method_name)
 
         return tests_by_class
 
@@ -196,13 +260,25 @@ class JavaTestRunner:
         if os.path.exists(file_path):
             return file_path
 
-        # If not found, try to search for it
+        # If not found, look it up by file name
+        if self._path_index is None:
+            self._path_index = self._build_path_index()
+
+        return self._path_index.get(os.path.basename(relative_path), [None])[0]
+
+    def _build_path_index(self) -> Dict[str, List[str]]:
+        """
+        Index the Java files under the test directory by file name.
+
+        Returns:
+            Dict[str, List[str]]: Dictionary mapping file names to the paths of the files with that name
+        """
+        path_index = {}
         for root, _, files in os.walk(self.test_dir):
             for file in files:
-                if file == os.path.basename(relative_path):
-                    return os.path.join(root, file)
-
-        return None
+                if file.endswith(".java"):
+                    path_index.setdefault(file, []).append(os.path.join(root, file))
+        return path_index
 
     def _run_maven_tests(self, class_name: str, methods: List[str]) -> Dict[str, bool]:
         """
@@ -215,32 +291,40 @@ class JavaTestRunner:
         Returns:
             Dict[str, bool]: Dictionary mapping test names to their pass/fail status
         """
-        results = {}
+        return self._run_maven_suite({class_name: methods})
 
+    def _run_maven_suite(self, tests_by_class: Dict[str, List[str]]) -> Dict[str, bool]:
+        """
+        Run tests from one or more classes in a single Maven invocation.
+
+        Args:
+            tests_by_class (Dict[str, List[str]]): Dictionary mapping class names to lists of test methods
+
+        Returns:
+            Dict[str, bool]: Dictionary mapping test names to their pass/fail status
+        """
         # Build the Maven command to run specific tests
-        test_methods = [f"{class_name}#{method}" for method in methods]
+        test_methods = [f"{class_name}#{method}" for class_name, methods in tests_by_class.items() for method in methods]
         test_string = ",".join(test_methods)
 
         cmd = ["mvn", "test", "-Dtest=" + test_string]
+        if self.in_process:
+            cmd.append("-DforkCount=0")
 
         # Run the command
+        started = time.time()
         success, stdout, stderr = run_subprocess(
             cmd, 
             self.project_dir, 
             "Error running Maven tests"
         )
 
-        # Parse the output to determine which tests passed/failed
-        for method in methods:
-            test_name = f"{class_name}.{method}"
-            if success and f"Tests run: 1, Failures: 0, Errors: 0" in stdout:
-                results[test_name] = True
-            else:
-                results[test_name] = False
-                if not success:
-                    logging.error(f"Test {test_name} failed: {stderr}")
+        # Without a report for a test, go by Surefire's summary: every run must be free of failures and errors
+        summaries = _SUREFIRE_SUMMARY_RE.findall(stdout)
+        passed = success and bool(summaries) and all(failures == "0" and errors == "0" for _, failures, errors in summaries)
 
-        return results
+        report_dir = os.path.join(self.project_dir, "target", "surefire-reports")
+        return self._collect_results(tests_by_class, report_dir, started, passed, success, stderr)
 
     def _run_gradle_tests(self, class_name: str, methods: List[str]) -> Dict[str, bool]:
         """
@@ -253,32 +337,71 @@ class JavaTestRunner:
         Returns:
             Dict[str, bool]: Dictionary mapping test names to their pass/fail status
         """
-        results = {}
+        return self._run_gradle_suite({class_name: methods})
 
-        # Build the Gradle command to run specific tests
-        test_filter = f"{class_name}"
-        if methods:
-            method_filters = [f"{method}" for method in methods]
-            test_filter = f"{class_name}.{{{','.join(method_filters)}}}"
+    def _run_gradle_suite(self, tests_by_class: Dict[str, List[str]]) -> Dict[str, bool]:
+        """
+        Run tests from one or more classes in a single Gradle invocation.
 
-        cmd = ["gradle", "test", f"--tests", test_filter]
+        Args:
+            tests_by_class (Dict[str, List[str]]): Dictionary mapping class names to lists of test methods
+
+        Returns:
+            Dict[str, bool]: Dictionary mapping test names to their pass/fail status
+        """
+        # Build the Gradle command to run specific tests, with one filter per class
+        cmd = ["gradle", "test"]
+        for class_name, methods in tests_by_class.items():
+            test_filter = f"{class_name}"
+            if methods:
+                method_filters = [f"{method}" for method in methods]
+                test_filter = f"{class_name}.{{{','.join(method_filters)}}}"
+            cmd.extend(["--tests", test_filter])
 
         # Run the command
+        started = time.time()
         success, stdout, stderr = run_subprocess(
             cmd, 
             self.project_dir, 
             "Error running Gradle tests"
         )
 
-        # Parse the output to determine which tests passed/failed
-        for method in methods:
-            test_name = f"{class_name}.{method}"
-            if success and "SUCCESS" in stdout and "FAILED" not in stdout:
-                results[test_name] = True
-            else:
-                results[test_name] = False
-                if not success:
-                    logging.error(f"Test {test_name} failed: {stderr}")
+        passed = success and "SUCCESS" in stdout and "FAILED" not in stdout
+
+        report_dir = os.path.join(self.project_dir, "build", "test-results", "test")
+        return self._collect_results(tests_by_class, report_dir, started, passed, success, stderr)
+
+    def _collect_results(self, tests_by_class: Dict[str, List[str]], report_dir: str, started: float,
+                         passed: bool, success: bool, stderr: str) -> Dict[str, bool]:
+        """
+        Determine the status of each test of a build tool run.
+
+        Tests are looked up in the JUnit XML reports written by the run; tests without a report get the
+        status of the run as a whole.
+
+        Args:
+            tests_by_class (Dict[str, List[str]]): Dictionary mapping class names to lists of test methods
+            report_dir (str): Directory the build tool writes its JUnit XML reports to
+            started (float): Time the run started, so reports of earlier runs are ignored
+            passed (bool): Whether the run as a whole passed, judging by its output
+            success (bool): Whether the build tool exited successfully
+            stderr (str): The build tool's error output
+
+        Returns:
+            Dict[str, bool]: Dictionary mapping test names to their pass/fail status
+        """
+        reports = _read_junit_reports(report_dir, started)
+
+        results = {}
+        for class_name, methods in tests_by_class.items():
+            for method in methods:
+                test_name = f"{class_name}.{method}"
+                if test_name in reports:
+                    results[test_name] = reports[test_name]
+                else:
+                    results[test_name] = passed
+                    if not success:
+                        logging.error(f"Test {test_name} failed: {stderr}")
 
         return results
 
@@ -300,7 +423,7 @@ class JavaTestRunner:
 
         return temp_dir, src_dir
 
-    def _compile_test_file(self, file_path: str, temp_dir: str, src_dir: str) -> bool:
+    def _compile_test_file(self, file_path: str, temp_dir: str, src_dir: str, class_name: Optional[str] = None) -> bool:
         """
         Compile a Java test file.
 
@@ -308,10 +431,20 @@ class JavaTestRunner:
             file_path (str): Path to the Java test file
             temp_dir (str): Directory for compiled classes
             src_dir (str): Source directory
+            class_name (str, optional): Fully qualified class name, to skip compiling an up to date class
 
         Returns:
             bool: True if compilation succeeded, False otherwise
         """
+        # Skip files already compiled, e.g. as a dependency of an earlier test class
+        if class_name:
+            class_file = os.path.join(temp_dir, *class_name.split(".")) + ".class"
+            try:
+                if os.path.getmtime(class_file) >= os.path.getmtime(file_path):
+                    return True
+            except OSError:
+                pass
+
         # Compile the test file
         compile_cmd = [
             "javac", 
@@ -388,16 +521,20 @@ class JavaTestRunner:
             temp_dir, src_dir = self._create_temp_dir()
 
             # Compile the test file
-            if not self._compile_test_file(file_path, temp_dir, src_dir):
+            if not self._compile_test_file(file_path, temp_dir, src_dir, class_name):
                 # Compilation failed, mark all tests as failed
                 for method in methods:
                     results[f"{class_name}.{method}"] = False
                 return results
 
-            # Run each test method
-            for method in methods:
-                test_name = f"{class_name}.{method}"
-                results[test_name] = self._run_single_test(class_name, method, temp_dir, src_dir)
+            if self.junit_console_jar:
+                # Run all test methods in one JVM
+                results = self._run_console_launcher(class_name, methods, temp_dir, src_dir)
+            else:
+                # Run each test method
+                for method in methods:
+                    test_name = f"{class_name}.{method}"
+                    results[test_name] = self._run_single_test(class_name, method, temp_dir, src_dir)
 
         except Exception as e:
             logging.error(f"Error running Java tests: {e}")
@@ -405,18 +542,135 @@ class JavaTestRunner:
                 results[f"{class_name}.{method}"] = False
 
         finally:
-            # Clean up temporary directory
-            if temp_dir and os.path.exists(temp_dir):
-                try:
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                except Exception as e:
-                    logging.warning(f"Failed to clean up temporary directory: {e}")
+            if not self._keep_temp_dir:
+                self._remove_temp_dir(temp_dir)
+
+        return results
+
+    def _run_console_launcher(self, class_name: str, methods: List[str], temp_dir: str, src_dir: str) -> Dict[str, bool]:
+        """
+        Run test methods in a single JVM with the JUnit Platform Console Launcher.
+
+        Args:
+            class_name (str): Fully qualified class name
+            methods (List[str]): List of test method names to run
+            temp_dir (str): Directory with compiled classes
+            src_dir (str): Source directory
+
+        Returns:
+            Dict[str, bool]: Dictionary mapping test names to their pass/fail status
+        """
+        reports_dir = os.path.join(temp_dir, "junit-reports")
+        # Reports of an earlier class would otherwise be read again
+        shutil.rmtree(reports_dir, ignore_errors=True)
+
+        run_cmd = [
+            "java",
+            "-jar", self.junit_console_jar,
+            "-cp", f"{temp_dir}{os.pathsep}{src_dir}",
+            "--reports-dir", reports_dir
+        ]
+        for method in methods:
+            run_cmd.extend(["--select-method", f"{class_name}#{method}"])
+
+        success, _, stderr = run_subprocess(
+            run_cmd,
+            self.project_dir,
+            f"Error running tests in {class_name}"
+        )
+
+        reports = {}
+        try:
+            report_files = sorted(os.listdir(reports_dir))
+        except OSError:
+            report_files = []
+        for report_file in report_files:
+            if report_file.endswith(".xml"):
+                _read_junit_report(os.path.join(reports_dir, report_file), class_name, reports)
+
+        results = {}
+        for method in methods:
+            test_name = f"{class_name}.{method}"
+            results[test_name] = reports.get(test_name, False)
+            if test_name not in reports and not success:
+                logging.error(f"Test {test_name} failed: {stderr}")
 
         return results
 
+    def _remove_temp_dir(self, temp_dir: Optional[str]) -> None:
+        """
+        Remove the directory for compiled classes.
+
+        Args:
+            temp_dir (Optional[str]): Directory for compiled classes
+        """
+        if temp_dir and os.path.exists(temp_dir):
+            try:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            except Exception as e:
+                logging.warning(f"Failed to clean up temporary directory: {e}")
+
+
+def _read_junit_reports(report_dir: str, since: float) -> Dict[str, bool]:
+    """
+    Read test statuses from the JUnit XML reports (TEST-*.xml) written by Surefire or Gradle.
+
+    All reports written by the run are read, so test cases reported under another suite, such as
+    nested classes, are found as well.
+
+    Args:
+        report_dir (str): Directory containing the reports
+        since (float): Reports last modified before this time are left out as stale
+
+    Returns:
+        Dict[str, bool]: Dictionary mapping test names found in the reports to their pass/fail status
+    """
+    results = {}
+    try:
+        entries = sorted(os.scandir(report_dir), key=lambda entry: entry.name)
+    except OSError:
+        return results
+
+    for entry in entries:
+        if not (entry.name.startswith("TEST-") and entry.name.endswith(".xml")):
+            continue
+        try:
+            # Allow for coarse file system timestamps
+            if entry.stat().st_mtime < since - 1:
+                continue
+        except OSError:
+            continue
+        class_name = entry.name[len("TEST-"):-len(".xml")]
+        _read_junit_report(entry.path, class_name, results)
+    return results
+
+
+def _read_junit_report(report_file: str, class_name: str, results: Dict[str, bool]) -> None:
+    """
+    Add the test statuses of a single JUnit XML report to the results.
+
+    Args:
+        report_file (str): Path to the report
+        class_name (str): Class name for test cases without a classname attribute
+        results (Dict[str, bool]): Dictionary mapping test names to their pass/fail status, updated in place
+    """
+    try:
+        for _, elem in ET.iterparse(report_file):
+            if elem.tag == "testcase":
+                # JUnit 5 reports name methods with their parameter list, e.g. "testMethod()", and both JUnit 4
+                # and 5 add an index to each invocation of a parameterized or repeated test, e.g. "testMethod[1]"
+                method = _TEST_CASE_SUFFIX_RE.sub("", elem.get("name", ""))
+                test_name = f"{elem.get('classname') or class_name}.{method}"
+                passed = elem.find("failure") is None and elem.find("error") is None
+                # A method passes only if all of its invocations do
+                results[test_name] = results.get(test_name, True) and passed
+                elem.clear()
+    except (OSError, ET.ParseError) as e:
+        logging.warning(f"Could not read test report {report_file}: {e}")
+
 
 def run_impacted_tests(project_dir: str, impacted_tests: List[str], 
-                      test_dir: str = None, build_tool: str = "maven") -> Dict[str, bool]:
+                      test_dir: str = None, build_tool: str = "maven", in_process: bool = False) -> Dict[str, bool]:
     """
     Run the impacted tests and return the results.
 
@@ -426,33 +680,34 @@ def run_impacted_tests(project_dir: str, impacted_tests: List[str],
         test_dir (str, optional): Directory containing Java test files
         build_tool (str, optional): Build tool used by the project ('maven', 'gradle', or 'java')
                                    Use 'java' for projects without Maven or Gradle
+        in_process (bool, optional): Run Maven tests inside the Maven JVM rather than a forked one
 
     Returns:
         Dict[str, bool]: Dictionary mapping test names to their pass/fail status
     """
-    runner = JavaTestRunner(project_dir, test_dir, build_tool)
+    runner = JavaTestRunner(project_dir, test_dir, build_tool, in_process=in_process)
     return runner.run_impacted_tests(impacted_tests)
 
 
-def run_impacted_tests_from_analyzer_output(project_dir: str, analyzer_output: Dict[str, List[str]],
-                                          test_dir: str = None, build_tool: str = "maven") -> Dict[str, bool]:
+def run_impacted_tests_from_analyzer_output(project_dir: str, analyzer_output: Dict[str, Set[str]],
+                                          test_dir: str = None, build_tool: str = "maven",
+                                          in_process: bool = False) -> Dict[str, bool]:
     """
     Run tests impacted by changes based on the output from JavaTestAnalyzer.
 
     Args:
         project_dir (str): Root directory of the Java project
-        analyzer_output (Dict[str, List[str]]): Output from JavaTestAnalyzer.get_impacted_tests()
+        analyzer_output (Dict[str, Set[str]]): Output from JavaTestAnalyzer.get_impacted_tests()
         test_dir (str, optional): Directory containing Java test files
         build_tool (str, optional): Build tool used by the project ('maven', 'gradle', or 'java')
                                    Use 'java' for projects without Maven or Gradle
+        in_process (bool, optional): Run Maven tests inside the Maven JVM rather than a forked one
 
     Returns:
         Dict[str, bool]: Dictionary mapping test names to their pass/fail status
     """
-    # Flatten the list of impacted tests
-    all_impacted_tests = set()
-    for tests in analyzer_output.values():
-        all_impacted_tests.update(tests)
+    # Flatten the impacted tests
+    all_impacted_tests = set().union(*analyzer_output.values())
 
     # Run the tests
-    return run_impacted_tests(project_dir, list(all_impacted_tests), test_dir, build_tool)
+    return run_impacted_tests(project_dir, list(all_impacted_tests), test_dir, build_tool, in_process)
@@ -2,17 +2,33 @@
 Tests for the CLI module.
 """
 
+import logging
 import os
+import sys
 import pytest
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import patch, Mock
 
+from src.jade import cli
 from src.jade.cli import parse_args, get_comparison_commits, get_changed_methods, main
 
 
+@pytest.fixture(autouse=True)
+def tree_cache_file(tmp_path, monkeypatch):
+    """Keep the persisted parse tree and analysis caches out of the user's home directory."""
+    cache_file = str(tmp_path / "ast")
+    monkeypatch.setattr("src.jade.java_parser.DEFAULT_TREE_CACHE_DIR", cache_file)
+    monkeypatch.setattr("src.jade.java_parser._tree_cache_dir", None)
+    monkeypatch.setattr("src.jade.java_parser.DEFAULT_ANALYSIS_CACHE_FILE", str(tmp_path / "analysis.sqlite"))
+    monkeypatch.setattr("src.jade.java_parser._analysis_cache_file", None)
+    return cache_file
+
+
 @pytest.fixture
 def mock_git():
     """Fixture to mock git functions."""
-    with patch("src.jade.cli.git") as mock_git:
+    # A MagicMock, as the CLI reads blobs through `with git.BatchCat() as ...`
+    with patch.object(cli, "git") as mock_git:
         # Mock get_previous_commit
         mock_git.get_previous_commit.return_value = "abc123"
 
@@ -22,8 +38,22 @@ def mock_git():
         # Mock get_git_diff
         mock_git.get_git_diff.return_value = "diff output"
 
-        # Mock get_affected_files
-        mock_git.get_affected_files.return_value = ["file1.java", "file2.java"]
+        # Mock resolve_refs
+        mock_git.resolve_refs.return_value = ["def456", "ghi789"]
+
+        # Mock BatchCat
+        mock_git.BatchCat.return_value.__enter__.return_value.read.return_value = b"class Placeholder {}\n"
+
+        # Mock iter_git_diff
+        mock_git.iter_git_diff.side_effect = lambda *args: iter([
+            b"diff --git a/file1.java b/file1.java\n",
+            b"@@ -1,0 +2,1 @@\n",
+            b"+int x;\n",
+            b"diff --git a/file2.java b/file2.java\n",
+            b"@@ -4,1 +4,1 @@\n",
+            b"-int y;\n",
+            b"+long y;\n",
+        ])
 
         yield mock_git
 
@@ -31,10 +61,11 @@ def mock_git():
 @pytest.fixture
 def mock_java_test_analyzer():
     """Fixture to mock java_test_analyzer functions."""
-    with patch("src.jade.cli.java_test_analyzer") as mock_analyzer:
+    with patch.object(cli, "java_test_analyzer", new_callable=Mock) as mock_analyzer:
         # Mock analyze_java_tests
-        mock_analyzer_instance = MagicMock()
+        mock_analyzer_instance = Mock()
         mock_analyzer.analyze_java_tests.return_value = mock_analyzer_instance
+        mock_analyzer_instance.get_impacted_tests_union.return_value = {"com.example.SomeClassTest.testSomeMethod"}
 
         # Mock identify_impacted_tests
         mock_analyzer.identify_impacted_tests.return_value = {
@@ -47,9 +78,9 @@ def mock_java_test_analyzer():
 @pytest.fixture
 def mock_java_test_runner():
     """Fixture to mock java_test_runner functions."""
-    with patch("src.jade.cli.java_test_runner") as mock_runner:
-        # Mock run_impacted_tests_from_analyzer_output
-        mock_runner.run_impacted_tests_from_analyzer_output.return_value = {
+    with patch.object(cli, "java_test_runner", new_callable=Mock) as mock_runner:
+        # Mock run_impacted_tests
+        mock_runner.run_impacted_tests.return_value = {
             "com.example.SomeClassTest.testSomeMethod": True
         }
 
@@ -58,88 +89,39 @@ def mock_java_test_runner():
 
 def test_parse_args():
     """Test parsing command-line arguments."""
-    with patch("sys.argv", ["jade", "-c", "1"]):
-        args = parse_args()
-        assert args.commits_back == 1
-        assert args.project_dir == "."
-        assert args.build_tool == "maven"
-        assert not args.tests_only
-        assert not args.run_tests
-
-
-def test_get_comparison_commits_with_commits_back(mock_git):
-    """Test get_comparison_commits with -c option."""
-    args = MagicMock()
-    args.commits_back = 1
-    args.branch = None
-    args.commit = None
-
-    base_commit, target_commit = get_comparison_commits(args)
-
-    mock_git.get_previous_commit.assert_called_once_with(1)
-    assert base_commit == "abc123"
-    assert target_commit == "HEAD"
-
-
-def test_get_comparison_commits_with_branch(mock_git):
-    """Test get_comparison_commits with --branch option."""
-    args = MagicMock()
-    args.commits_back = None
-    args.branch = ["feature"]
-    args.commit = None
-
-    base_commit, target_commit = get_comparison_commits(args)
-
-    mock_git.get_branch_head.assert_called_once_with("feature")
-    assert base_commit == "def456"
-    assert target_commit == "HEAD"
-
-
-def test_get_comparison_commits_with_two_branches(mock_git):
-    """Test get_comparison_commits with two --branch options."""
-    args = MagicMock()
-    args.commits_back = None
-    args.branch = ["feature1", "feature2"]
-    args.commit = None
-
-    base_commit, target_commit = get_comparison_commits(args)
-
-    mock_git.get_branch_head.assert_any_call("feature1")
-    mock_git.get_branch_head.assert_any_call("feature2")
-    assert base_commit == "def456"
-    assert target_commit == "def456"
-
-
-def test_get_comparison_commits_with_commit(mock_git):
-    """Test get_comparison_commits with --commit option."""
-    args = MagicMock()
-    args.commits_back = None
-    args.branch = None
-    args.commit = ["9961f321"]
-
-    base_commit, target_commit = get_comparison_commits(args)
-
-    # No git function should be called, the commit hash should be used directly
-    mock_git.get_previous_commit.assert_not_called()
-    mock_git.get_branch_head.assert_not_called()
-    assert base_commit == "9961f321"
-    assert target_commit == "HEAD"
-
-
-def test_get_comparison_commits_with_two_commits(mock_git):
-    """Test get_comparison_commits with two --commit options."""
-    args = MagicMock()
-    args.commits_back = None
-    args.branch = None
-    args.commit = ["9961f321", "a3912c84"]
+    args = parse_args(["-c", "1"])
+    assert args.commits_back == 1
+    assert args.project_dir == "."
+    assert args.build_tool == "maven"
+    assert not args.tests_only
+    assert not args.run_tests
+
+
+@pytest.mark.parametrize("commits_back,branch,commit,expected,expected_call,not_called", [
+    pytest.param(1, None, None, ("abc123", "HEAD"), ("get_previous_commit", (1,)), ["get_branch_head"],
+                 id="commits_back"),
+    pytest.param(None, ["feature"], None, ("def456", "HEAD"), ("get_branch_head", ("feature",)),
+                 ["get_previous_commit"], id="branch"),
+    pytest.param(None, ["feature1", "feature2"], None, ("def456", "ghi789"),
+                 ("resolve_refs", ("feature1", "feature2")), ["get_branch_head"], id="two_branches"),
+    # No git function should be called, the commit hashes should be used directly
+    pytest.param(None, None, ["9961f321"], ("9961f321", "HEAD"), None,
+                 ["get_previous_commit", "get_branch_head"], id="commit"),
+    pytest.param(None, None, ["9961f321", "a3912c84"], ("9961f321", "a3912c84"), None,
+                 ["get_previous_commit", "get_branch_head"], id="two_commits"),
+])
+def test_get_comparison_commits(mock_git, commits_back, branch, commit, expected, expected_call, not_called):
+    """Test get_comparison_commits with the -c, --branch and --commit options."""
+    args = SimpleNamespace(commits_back=commits_back, branch=branch, commit=commit)
 
     base_commit, target_commit = get_comparison_commits(args)
 
-    # No git function should be called, the commit hashes should be used directly
-    mock_git.get_previous_commit.assert_not_called()
-    mock_git.get_branch_head.assert_not_called()
-    assert base_commit == "9961f321"
-    assert target_commit == "a3912c84"
+    if expected_call:
+        name, call_args = expected_call
+        getattr(mock_git, name).assert_called_once_with(*call_args)
+    for name in not_called:
+        getattr(mock_git, name).assert_not_called()
+    assert (base_commit, target_commit) == expected
 
 
 def test_get_changed_methods(mock_git):
@@ -150,43 +132,74 @@ def test_get_changed_methods(mock_git):
 
     changed_methods = get_changed_methods(base_commit, target_commit, project_dir)
 
-    mock_git.get_git_diff.assert_called_once_with(base_commit, target_commit)
-    mock_git.get_affected_files.assert_called_once_with(base_commit, target_commit)
+    mock_git.iter_git_diff.assert_called_once_with(base_commit, target_commit)
+    mock_git.BatchCat.return_value.__enter__.return_value.read.assert_any_call(target_commit, "file1.java")
+    mock_git.get_git_diff.assert_not_called()
+    mock_git.get_affected_files.assert_not_called()
     assert changed_methods == ["com.example.SomeClass.someMethod"]  # Placeholder value
 
 
-def test_main_with_tests_only(mock_git, mock_java_test_analyzer, mock_java_test_runner):
-    """Test main function with --tests-only option."""
-    with patch("sys.argv", ["jade", "-c", "1", "--tests-only"]):
-        with patch("src.jade.cli.logging.info") as mock_logging_info:
-            main()
+@pytest.mark.parametrize("flag,expect_runner,expect_union,expected_messages", [
+    ("--tests-only", False, True, ["\nImpacted tests:"]),
+    ("--run-tests", True, False, ["\nRunning impacted tests...", "\nTest results:"]),
+])
+def test_main(flag, expect_runner, expect_union, expected_messages, mock_git, mock_java_test_analyzer,
+              mock_java_test_runner, caplog, monkeypatch):
+    """Test main function with the --tests-only and --run-tests options."""
+    caplog.set_level(logging.INFO)
+    monkeypatch.setattr(sys, "argv", ["jade", "-c", "1", flag])
+    main()
 
-            # Check that the correct functions were called
-            mock_git.get_previous_commit.assert_called_once_with(1)
-            mock_java_test_analyzer.analyze_java_tests.assert_called_once()
-            mock_java_test_analyzer.identify_impacted_tests.assert_called_once()
-
-            # Check that run_impacted_tests_from_analyzer_output was not called
-            mock_java_test_runner.run_impacted_tests_from_analyzer_output.assert_not_called()
-
-            # Check that the correct output was logged
-            mock_logging_info.assert_any_call("\nImpacted tests:")
-
-
-def test_main_with_run_tests(mock_git, mock_java_test_analyzer, mock_java_test_runner):
-    """Test main function with --run-tests option."""
-    with patch("sys.argv", ["jade", "-c", "1", "--run-tests"]):
-        with patch("src.jade.cli.logging.info") as mock_logging_info:
-            main()
-
-            # Check that the correct functions were called
-            mock_git.get_previous_commit.assert_called_once_with(1)
-            mock_java_test_analyzer.analyze_java_tests.assert_called_once()
-            mock_java_test_analyzer.identify_impacted_tests.assert_called_once()
-
-            # Check that run_impacted_tests_from_analyzer_output was called
-            mock_java_test_runner.run_impacted_tests_from_analyzer_output.assert_called_once()
-
-            # Check that the correct output was logged
-            mock_logging_info.assert_any_call("\nRunning impacted tests...")
-            mock_logging_info.assert_any_call("\nTest results:")
+    # Check that the correct functions were called
+    mock_git.get_previous_commit.assert_called_once_with(1)
+    mock_java_test_analyzer.analyze_java_tests.assert_called_once()
+
+    # Check that the tests were looked up per changed method only to show them that way
+    analyzer = mock_java_test_analyzer.analyze_java_tests.return_value
+    if expect_union:
+        analyzer.get_impacted_tests_union.assert_called_once_with(["com.example.SomeClass.someMethod"])
+        mock_java_test_analyzer.identify_impacted_tests.assert_not_called()
+    else:
+        analyzer.get_impacted_tests_union.assert_not_called()
+        mock_java_test_analyzer.identify_impacted_tests.assert_called_once()
+
+    # Check that run_impacted_tests was only called to run the tests
+    run_tests = mock_java_test_runner.run_impacted_tests
+    if expect_runner:
+        run_tests.assert_called_once()
+        assert run_tests.call_args.args[1] == ["com.example.SomeClassTest.testSomeMethod"]
+    else:
+        run_tests.assert_not_called()
+
+    # Check that the correct output was logged
+    for message in expected_messages:
+        assert message in caplog.messages
+
+
+@pytest.mark.parametrize("cache_args,use_cache,cache_dir,cache_file", [
+    (["--no-cache"], False, None, None),
+    (["--cache-dir", "custom-cache"], True, "custom-cache", os.path.join("custom-cache", "test_mapping.json")),
+])
+def test_main_cache_options(cache_args, use_cache, cache_dir, cache_file, mock_git, mock_java_test_analyzer,
+                            mock_java_test_runner, monkeypatch):
+    """Test that --no-cache and --cache-dir reach every cache."""
+    monkeypatch.setattr(sys, "argv", ["jade", "-c", "1", "--tests-only", *cache_args])
+    with patch.object(cli, "get_changed_methods", return_value=[]) as mock_get_changed_methods:
+        main()
+
+    _, kwargs = mock_get_changed_methods.call_args
+    assert (kwargs["use_cache"], kwargs["cache_dir"]) == (use_cache, cache_dir)
+    _, kwargs = mock_java_test_analyzer.analyze_java_tests.call_args
+    assert kwargs["cache_file"] == cache_file
+
+
+def test_get_changed_methods_cache_options(mock_git, tmp_path):
+    """Test that the parse caches stay disabled with use_cache=False and live in cache_dir otherwise."""
+    get_changed_methods("abc123", "def456", ".", use_cache=False)
+    assert cli.java_parser._analysis_cache_file is None
+    assert cli.java_parser._tree_cache_dir is None
+
+    cache_dir = str(tmp_path / "custom-cache")
+    get_changed_methods("abc123", "def456", ".", cache_dir=cache_dir)
+    assert cli.java_parser._analysis_cache_file == os.path.join(cache_dir, "analysis.sqlite")
+    assert cli.java_parser._tree_cache_dir.startswith(os.path.join(cache_dir, "ast"))
@@ -1,151 +1,192 @@
-from unittest.mock import patch
+import io
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
 
-from src.jade.git import *
+import pytest
 
-def test_get_previous_commit():
-    # Mock output of the `git rev-parse HEAD~1` command
-    mock_output = "a3912c84e9f1b7c0037f283ed14021ba9bed5362"
+from src.jade.git import (
+    BatchCat,
+    get_affected_files,
+    get_branch_head,
+    get_git_diff,
+    get_previous_commit,
+    iter_git_diff,
+    resolve_refs,
+)
 
-    # Prepare the mock CompletedProcess response
-    mock_result = subprocess.CompletedProcess(
-        args=["git", "rev-parse", "HEAD~1"], returncode=0, stdout=mock_output, stderr=""
-    )
+# A changed file of the sample diffs below
+METRICS_AGGREGATOR = "real-time-composite-app/src/main/java/com/bidfx/composite/quality/MetricsAggregator.java"
 
-    # Mock subprocess.run to return the mocked output
-    with patch("subprocess.run", return_value=mock_result) as mock_subprocess:
-        result = get_previous_commit(1)  # Call the function being tested
-
-        # Assertions to check the behavior
-        mock_subprocess.assert_called_once_with(
-            ["git", "rev-parse", "HEAD~1"],
-            capture_output=True,
-            text=True,
-        )
-        # Expected result based on the mock output
-        assert result == "a3912c84e9f1b7c0037f283ed14021ba9bed5362"
-
-def test_get_previous_commit_with_n():
-    # Mock output of the `git rev-parse HEAD~3` command
-    mock_output = "9961f321e9f1b7c0037f283ed14021ba9bed5362"
-
-    # Prepare the mock CompletedProcess response
-    mock_result = subprocess.CompletedProcess(
-        args=["git", "rev-parse", "HEAD~3"], returncode=0, stdout=mock_output, stderr=""
-    )
 
-    # Mock subprocess.run to return the mocked output
-    with patch("subprocess.run", return_value=mock_result) as mock_subprocess:
-        result = get_previous_commit(3)  # Call the function being tested
+@pytest.fixture
+def mock_run():
+    """Fixture to mock subprocess.run; tests set the CompletedProcess it returns."""
+    with patch("subprocess.run") as mock_subprocess:
+        yield mock_subprocess
 
-        # Assertions to check the behavior
-        mock_subprocess.assert_called_once_with(
-            ["git", "rev-parse", "HEAD~3"],
-            capture_output=True,
-            text=True,
-        )
-        # Expected result based on the mock output
-        assert result == "9961f321e9f1b7c0037f283ed14021ba9bed5362"
 
-def test_get_branch_head():
-    # Mock output of the `git rev-parse main` command
-    mock_output = "e74f546d5ff6481337cee804403985962440319f"
+def completed_process(args, stdout):
+    """Build the CompletedProcess of a successful git command."""
+    return subprocess.CompletedProcess(args=args, returncode=0, stdout=stdout, stderr=b"")
+
+
+@pytest.mark.parametrize("n,mock_output", [
+    (1, b"a3912c84e9f1b7c0037f283ed14021ba9bed5362"),
+    (3, b"9961f321e9f1b7c0037f283ed14021ba9bed5362"),
+])
+def test_get_previous_commit(mock_run, n, mock_output):
+    # Mock output of the `git rev-parse HEAD~n` command
+    mock_run.return_value = completed_process(["git", "rev-parse", f"HEAD~{n}"], mock_output)
 
-    # Prepare the mock CompletedProcess response
-    mock_result = subprocess.CompletedProcess(
-        args=["git", "rev-parse", "main"], returncode=0, stdout=mock_output, stderr=""
+    result = get_previous_commit(n)  # Call the function being tested
+
+    # Assertions to check the behavior
+    mock_run.assert_called_once_with(
+        ["git", "rev-parse", f"HEAD~{n}"],
+        capture_output=True,
     )
+    # Expected result based on the mock output
+    assert result == mock_output.decode()
 
-    # Mock subprocess.run to return the mocked output
-    with patch("subprocess.run", return_value=mock_result) as mock_subprocess:
-        result = get_branch_head("main")  # Call the function being tested
+def test_get_branch_head(mock_run):
+    # Mock output of the `git rev-parse main` command
+    mock_run.return_value = completed_process(
+        ["git", "rev-parse", "main"], b"e74f546d5ff6481337cee804403985962440319f"
+    )
 
-        # Assertions to check the behavior
-        mock_subprocess.assert_called_once_with(
-            ["git", "rev-parse", "main"],
-            capture_output=True,
-            text=True,
-        )
-        # Expected result based on the mock output
-        assert result == "e74f546d5ff6481337cee804403985962440319f"
+    result = get_branch_head("main")  # Call the function being tested
+
+    # Assertions to check the behavior
+    mock_run.assert_called_once_with(
+        ["git", "rev-parse", "main"],
+        capture_output=True,
+    )
+    # Expected result based on the mock output
+    assert result == "e74f546d5ff6481337cee804403985962440319f"
 
-def test_get_diff_files():
+def test_get_diff_files(mock_run):
     # Mock output of the `git diff --name-only` command
-    mock_output = """
-real-time-composite-app/src/main/java/com/bidfx/composite/quality/MetricsAggregator.java
-""".strip()
+    mock_run.return_value = completed_process(["git", "diff", "--name-only"], METRICS_AGGREGATOR.encode())
 
-    # Prepare the mock CompletedProcess response
-    mock_result = subprocess.CompletedProcess(
-        args=["git", "diff", "--name-only"], returncode=0, stdout=mock_output, stderr=""
+    base_commit = "e74f546d5ff6481337cee804403985962440319f"
+    result = get_affected_files(base_commit)  # Call the function being tested
+
+    # Assertions to check the behavior
+    mock_run.assert_called_once_with(
+        ["git", "diff", "--name-only", "--diff-filter=AMR", base_commit, "HEAD", "--", "*.java"],
+        capture_output=True,
     )
+    # Expected result based on the mock output
+    assert result == [METRICS_AGGREGATOR]
 
-    # Mock subprocess.run to return the mocked output
-    with patch("subprocess.run", return_value=mock_result) as mock_subprocess:
-        base_commit = "e74f546d5ff6481337cee804403985962440319f"
-        result = get_affected_files(base_commit)  # Call the function being tested
-
-        # Assertions to check the behavior
-        mock_subprocess.assert_called_once_with(
-            ["git", "diff", "--name-only", base_commit, "HEAD"],
-            capture_output=True,
-            text=True,
-        )
-        # Expected result based on the mock output
-        assert result == [
-            "real-time-composite-app/src/main/java/com/bidfx/composite/quality/MetricsAggregator.java"
-        ]
-
-def test_get_diff_output():
+def test_get_diff_output(mock_run):
     mock_output = (
-        "diff --git a/real-time-composite-app/src/main/java/com/bidfx/composite/quality/MetricsAggregator.java "
-        "b/real-time-composite-app/src/main/java/com/bidfx/composite/quality/MetricsAggregator.java\n"
-        "index 51ddf454..8d013d9b 100644\n"
-        "--- a/real-time-composite-app/src/main/java/com/bidfx/composite/quality/MetricsAggregator.java\n"
-        "+++ b/real-time-composite-app/src/main/java/com/bidfx/composite/quality/MetricsAggregator.java\n"
-        "@@ -84,0 +85,4 @@ public class MetricsAggregator implements CompositeSubscriber\n"
-        "+        if (nextIntervalMillis == 0)\n"
-        "+        {\n"
-        "+            nextIntervalMillis = intervalMillis;\n"
-        "+        }\n"
+        b"diff --git a/real-time-composite-app/src/main/java/com/bidfx/composite/quality/MetricsAggregator.java "
+        b"b/real-time-composite-app/src/main/java/com/bidfx/composite/quality/MetricsAggregator.java\n"
+        b"index 51ddf454..8d013d9b 100644\n"
+        b"--- a/real-time-composite-app/src/main/java/com/bidfx/composite/quality/MetricsAggregator.java\n"
+        b"+++ b/real-time-composite-app/src/main/java/com/bidfx/composite/quality/MetricsAggregator.java\n"
+        b"@@ -84,0 +85,4 @@ public class MetricsAggregator implements CompositeSubscriber\n"
+        b"+        if (nextIntervalMillis == 0)\n"
+        b"+        {\n"
+        b"+            nextIntervalMillis = intervalMillis;\n"
+        b"+        }\n"
     )
+    base_commit = "e74f546d"
+    expected_cmd = [
+        "git",
+        "-c", "diff.algorithm=histogram",
+        "-c", "core.pager=",
+        "diff",
+        "-U0",
+        "--no-color",
+        "--no-renames",
+        "--ignore-all-space",
+        "--diff-filter=AMR",
+        base_commit,
+        "HEAD",
+        "--",
+        "*.java",
+    ]
 
     # Mock the subprocess.run response
-    mock_result = subprocess.CompletedProcess(
-        args=[
-            "git",
-            "-c", "diff.algorithm=histogram",
-            "-c", "core.pager=",
-            "diff",
-            "-U0",
-            "--no-color",
-            "--ignore-all-space",
-            "e74f546d",
-            "HEAD",
-        ],
-        returncode=0,
-        stdout=mock_output,
-        stderr="",
+    mock_run.return_value = completed_process(expected_cmd, mock_output)
+
+    result = get_git_diff(base_commit)
+
+    # Assertions to ensure the function works as expected
+    mock_run.assert_called_once_with(expected_cmd, capture_output=True)
+    assert result == mock_output
+
+def test_resolve_refs(mock_run):
+    mock_run.return_value = completed_process(
+        ["git", "rev-parse", "main", "feature"],
+        b"e74f546d5ff6481337cee804403985962440319f\na3912c84e9f1b7c0037f283ed14021ba9bed5362\n",
     )
 
-    # Mock subprocess.run to return your mock_output when called
-    with patch("subprocess.run", return_value=mock_result) as mock_subprocess:
-        base_commit = "e74f546d"
-        result = get_git_diff(base_commit)
-
-        # Assertions to ensure the function works as expected
-        mock_subprocess.assert_called_once_with(
-            [
-                "git",
-                "-c", "diff.algorithm=histogram",
-                "-c", "core.pager=",
-                "diff",
-                "-U0",
-                "--no-color",
-                "--ignore-all-space",
-                base_commit,
-                "HEAD",
-            ],
-            capture_output=True,
-            text=True,
-        )
-        assert result == mock_output
+    result = resolve_refs("main", "feature")
+
+    mock_run.assert_called_once_with(
+        ["git", "rev-parse", "main", "feature"],
+        capture_output=True,
+    )
+    assert result == [
+        "e74f546d5ff6481337cee804403985962440319f",
+        "a3912c84e9f1b7c0037f283ed14021ba9bed5362",
+    ]
+
+def test_iter_git_diff_streams_lines():
+    mock_output = b"diff --git a/A.java b/A.java\n@@ -1,0 +2 @@\n+int x;\n"
+
+    mock_proc = MagicMock()
+    mock_proc.__enter__.return_value = mock_proc
+    mock_proc.stdout = io.BytesIO(mock_output)
+    mock_proc.wait.return_value = 0
+
+    with patch("subprocess.Popen", return_value=mock_proc) as mock_popen:
+        lines = iter_git_diff("e74f546d")
+
+        # Nothing runs until the diff is consumed
+        mock_popen.assert_not_called()
+        assert list(lines) == mock_output.splitlines(keepends=True)
+        assert mock_popen.call_args.args[0][-4:] == ["e74f546d", "HEAD", "--", "*.java"]
+
+def test_iter_git_diff_raises_on_failure():
+    mock_proc = MagicMock()
+    mock_proc.__enter__.return_value = mock_proc
+    mock_proc.stdout = io.BytesIO(b"")
+    mock_proc.wait.return_value = 128
+
+    def popen(cmd, stdout, stderr):
+        stderr.write(b"fatal: bad revision\n")
+        return mock_proc
+
+    with patch("subprocess.Popen", side_effect=popen):
+        with pytest.raises(RuntimeError, match="bad revision"):
+            list(iter_git_diff("nope"))
+
+def test_iter_git_diff_does_not_block_on_stderr():
+    # More warnings than a pipe buffer holds, written before any of the diff
+    script = "import sys; sys.stderr.write('warning: inexact rename detection\\n' * 20000); print('+int x;')"
+
+    with patch("src.jade.git._git_diff_cmd", return_value=[sys.executable, "-c", script]):
+        assert [line.strip() for line in iter_git_diff("e74f546d")] == [b"+int x;"]
+
+def test_batch_cat_reads_blobs_from_one_process():
+    mock_proc = MagicMock()
+    mock_proc.stdin = io.BytesIO()
+    mock_proc.stdout = io.BytesIO(
+        b"1111111111111111111111111111111111111111 blob 12\nclass A {}\n\n\n"
+        b"HEAD:Gone.java missing\n"
+    )
+
+    with patch("subprocess.Popen", return_value=mock_proc) as mock_popen:
+        with BatchCat() as blobs:
+            assert blobs.read("HEAD", "A.java") == b"class A {}\n\n"
+            with pytest.raises(RuntimeError, match="missing"):
+                blobs.read("HEAD", "Gone.java")
+            assert mock_proc.stdin.getvalue() == b"HEAD:A.java\nHEAD:Gone.java\n"
+
+        assert mock_popen.call_args.args[0] == ["git", "cat-file", "--batch"]
+        mock_proc.wait.assert_called_once()
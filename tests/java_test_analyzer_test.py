@@ -2,11 +2,15 @@
 Tests for the Java Test Analyzer module.
 """
 
+import json
 import os
 import tempfile
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+import javalang
 import pytest
 from unittest.mock import patch, mock_open, MagicMock
-from src.jade.java_test_analyzer import JavaTestAnalyzer, analyze_java_tests, identify_impacted_tests
+from src.jade.java_test_analyzer import JavaTestAnalyzer, analyze_java_tests, identify_impacted_tests, _scan_test_files
 
 # Sample Java test code
 sample_java_test_code = """
@@ -40,11 +44,38 @@ public class MyClassTest {
 }
 """
 
+@dataclass(frozen=True, slots=True)
 class MockMethodInvocation:
     """Mock for javalang.tree.MethodInvocation"""
-    def __init__(self, member, qualifier=None):
-        self.member = member
-        self.qualifier = qualifier
+    member: str
+    qualifier: Optional[str] = None
+
+@dataclass(frozen=True, slots=True)
+class MockAnnotation:
+    """Mock for javalang.tree.Annotation"""
+    name: str
+
+@dataclass(frozen=True, slots=True)
+class MockMethodDeclaration:
+    """Mock for javalang.tree.MethodDeclaration"""
+    name: str
+    annotations: List[MockAnnotation] = field(default_factory=list)
+    body: List[Any] = field(default_factory=list)
+
+@dataclass(frozen=True, slots=True)
+class MockPackage:
+    """Mock for javalang.tree.PackageDeclaration"""
+    name: str
+
+@dataclass(frozen=True, slots=True)
+class MockCompilationUnit:
+    """Mock for the javalang.tree.CompilationUnit returned by javalang.parse.parse"""
+    package: Optional[MockPackage] = None
+    methods: List[MockMethodDeclaration] = field(default_factory=list)
+
+    def filter(self, node_type):
+        # The analyzer only filters for method declarations
+        return [(None, method) for method in self.methods]
 
 @pytest.fixture
 def mock_javalang(monkeypatch):
@@ -72,23 +103,6 @@ def mock_javalang(monkeypatch):
 
     monkeypatch.setattr("builtins.isinstance", mock_isinstance)
 
-    class MockMethodDeclaration:
-        def __init__(self, name, annotations=None, body=None):
-            self.name = name
-            self.annotations = annotations or []
-            self.body = body or []
-
-    class MockAnnotation:
-        def __init__(self, name):
-            self.name = name
-
-    # Create mock tree
-    mock_tree = MagicMock()
-
-    # Mock package
-    mock_tree.package = MagicMock()
-    mock_tree.package.name = "com.example.tests"
-
     # Mock method declarations
     test_annotation = MockAnnotation("Test")
 
@@ -121,16 +135,8 @@ def mock_javalang(monkeypatch):
         [MockMethodInvocation("helperMethod", "instance")]
     )
 
-    # Configure the filter method to return our mock methods
-    mock_tree.filter.side_effect = lambda node_type: {
-        MockMethodDeclarationClass: [
-            ("path1", test_method1),
-            ("path2", test_method2),
-            ("path3", helper_method)
-        ]
-    }.get(node_type, [])
-
-    return mock_tree
+    # Create mock tree
+    return MockCompilationUnit(MockPackage("com.example.tests"), [test_method1, test_method2, helper_method])
 
 def test_process_test_file(mock_javalang, monkeypatch):
     """Test processing a single test file"""
@@ -187,7 +193,34 @@ def test_get_impacted_tests():
     # Check results
     assert set(impacted["ClassA.method1"]) == {"TestA.test1"}
     assert set(impacted["ClassB.method2"]) == {"TestA.test1", "TestB.test1"}
-    assert impacted["ClassD.method1"] == []  # No tests call this method
+    assert impacted["ClassD.method1"] == set()  # No tests call this method
+
+    # Test getting the union of impacted tests
+    assert analyzer.get_impacted_tests_union(changed_methods) == {"TestA.test1", "TestB.test1"}
+    assert analyzer.get_impacted_tests_union([]) == set()
+    assert "ClassD.method1" not in analyzer.method_to_tests_map
+
+def test_get_impacted_tests_matches_call_variants():
+    """Test that changed methods match calls through variables, `this`, bare names and simple class names"""
+    analyzer = JavaTestAnalyzer("dummy_dir")
+    analyzer._add_tests("CalculatorTest.java", [
+        ("CalculatorTest.testAdd", ["calculator.add", "assertEquals"]),
+        ("CalculatorTest.testReset", ["this.reset"]),
+        ("CalculatorTest.testMax", ["MathUtils.max"]),
+        ("CalculatorTest.testOtherMax", ["Collections.max"])
+    ])
+
+    impacted = analyzer.get_impacted_tests(["com.example.Calculator.add", "com.example.Calculator.reset",
+                                            "com.example.MathUtils.max"])
+
+    assert impacted["com.example.Calculator.add"] == {"CalculatorTest.testAdd"}
+    assert impacted["com.example.Calculator.reset"] == {"CalculatorTest.testReset"}
+    # Calls qualified by another class name are not matched
+    assert impacted["com.example.MathUtils.max"] == {"CalculatorTest.testMax"}
+
+    # The index follows changes to the mappings
+    analyzer._remove_tests("CalculatorTest.java")
+    assert analyzer.get_impacted_tests_union(["com.example.Calculator.add"]) == set()
 
 def test_save_and_load_mapping():
     """Test saving and loading test-to-method mappings"""
@@ -302,13 +335,6 @@ def test_get_test_coverage():
 
 def test_test_method_without_annotation(mock_javalang, monkeypatch):
     """Test processing a test file with methods that start with 'test' but don't have @Test annotation"""
-    # Create a mock method declaration without @Test annotation but with name starting with 'test'
-    class MockMethodDeclaration:
-        def __init__(self, name, annotations=None, body=None):
-            self.name = name
-            self.annotations = annotations or []
-            self.body = body or []
-
     # Create a test method that starts with 'test' but has no annotation
     test_method = MockMethodDeclaration(
         "testWithoutAnnotation",
@@ -317,12 +343,7 @@ def test_test_method_without_annotation(mock_javalang, monkeypatch):
     )
 
     # Configure mock tree
-    mock_tree = MagicMock()
-    mock_tree.package = MagicMock()
-    mock_tree.package.name = "com.example.tests"
-
-    # Configure the filter method to return our mock method
-    mock_tree.filter.side_effect = lambda node_type: [("path", test_method)]
+    mock_tree = MockCompilationUnit(MockPackage("com.example.tests"), [test_method])
 
     # Mock open and javalang.parse.parse
     monkeypatch.setattr("builtins.open", mock_open(read_data=""))
@@ -342,30 +363,25 @@ def test_test_method_without_annotation(mock_javalang, monkeypatch):
 def test_nested_method_calls(mock_javalang, monkeypatch):
     """Test handling nested method calls"""
     # Create a mock method with nested method calls
+    @dataclass(frozen=True, slots=True)
     class MockNestedStatement:
-        def __init__(self):
-            self.children = [
-                MockMethodInvocation("nestedMethod1", "obj"),
-                MockMethodInvocation("nestedMethod2", "obj")
-            ]
+        children: List[Any]
 
     # Create a test method with nested calls
-    class MockMethodDeclaration:
-        def __init__(self):
-            self.name = "testNestedCalls"
-            self.annotations = [MagicMock(name="Test")]
-            self.body = [
-                MockMethodInvocation("outerMethod", "instance"),
-                MockNestedStatement()
-            ]
+    test_method = MockMethodDeclaration(
+        "testNestedCalls",
+        [MockAnnotation("Test")],
+        [
+            MockMethodInvocation("outerMethod", "instance"),
+            MockNestedStatement([
+                MockMethodInvocation("nestedMethod1", "obj"),
+                MockMethodInvocation("nestedMethod2", "obj")
+            ])
+        ]
+    )
 
     # Configure mock tree
-    mock_tree = MagicMock()
-    mock_tree.package = MagicMock()
-    mock_tree.package.name = "com.example.tests"
-
-    # Configure the filter method to return our mock method
-    mock_tree.filter.side_effect = lambda node_type: [("path", MockMethodDeclaration())]
+    mock_tree = MockCompilationUnit(MockPackage("com.example.tests"), [test_method])
 
     # Mock open and javalang.parse.parse
     monkeypatch.setattr("builtins.open", mock_open(read_data=""))
@@ -384,9 +400,7 @@ def test_nested_method_calls(mock_javalang, monkeypatch):
 def test_empty_test_file(monkeypatch):
     """Test handling empty test files"""
     # Mock javalang.parse.parse to return a minimal tree
-    mock_tree = MagicMock()
-    mock_tree.package = None
-    mock_tree.filter.return_value = []
+    mock_tree = MockCompilationUnit()
 
     monkeypatch.setattr("builtins.open", mock_open(read_data=""))
     monkeypatch.setattr("javalang.parse.parse", lambda x: mock_tree)
@@ -421,32 +435,27 @@ def test_file_with_syntax_error(monkeypatch):
 def test_conditional_and_loop_statements(mock_javalang, monkeypatch):
     """Test handling test methods with conditional statements and loops"""
     # Create mock statements with blocks
+    @dataclass(frozen=True, slots=True)
     class MockIfStatement:
-        def __init__(self):
-            self.then_statement = MockMethodInvocation("thenMethod", "obj")
-            self.else_statement = MockMethodInvocation("elseMethod", "obj")
+        then_statement: Any
+        else_statement: Any
 
+    @dataclass(frozen=True, slots=True)
     class MockLoopStatement:
-        def __init__(self):
-            self.block = [MockMethodInvocation("loopMethod", "obj")]
+        block: List[Any]
 
     # Create a test method with conditional and loop statements
-    class MockMethodDeclaration:
-        def __init__(self):
-            self.name = "testConditionalAndLoop"
-            self.annotations = [MagicMock(name="Test")]
-            self.body = [
-                MockIfStatement(),
-                MockLoopStatement()
-            ]
+    test_method = MockMethodDeclaration(
+        "testConditionalAndLoop",
+        [MockAnnotation("Test")],
+        [
+            MockIfStatement(MockMethodInvocation("thenMethod", "obj"), MockMethodInvocation("elseMethod", "obj")),
+            MockLoopStatement([MockMethodInvocation("loopMethod", "obj")])
+        ]
+    )
 
     # Configure mock tree
-    mock_tree = MagicMock()
-    mock_tree.package = MagicMock()
-    mock_tree.package.name = "com.example.tests"
-
-    # Configure the filter method to return our mock method
-    mock_tree.filter.side_effect = lambda node_type: [("path", MockMethodDeclaration())]
+    mock_tree = MockCompilationUnit(MockPackage("com.example.tests"), [test_method])
 
     # Mock open and javalang.parse.parse
     monkeypatch.setattr("builtins.open", mock_open(read_data=""))
@@ -465,26 +474,31 @@ def test_conditional_and_loop_statements(mock_javalang, monkeypatch):
 def test_try_catch_blocks(mock_javalang, monkeypatch):
     """Test handling test methods with try/catch blocks"""
     # Create a mock try statement
+    @dataclass(frozen=True, slots=True)
+    class MockCatchClause:
+        block: List[Any]
+
+    @dataclass(frozen=True, slots=True)
     class MockTryStatement:
-        def __init__(self):
-            self.block = [MockMethodInvocation("tryMethod", "obj")]
-            self.catches = [MagicMock(block=[MockMethodInvocation("catchMethod", "obj")])]
-            self.finally_block = [MockMethodInvocation("finallyMethod", "obj")]
+        block: List[Any]
+        catches: List[MockCatchClause]
+        finally_block: List[Any]
 
     # Create a test method with try/catch
-    class MockMethodDeclaration:
-        def __init__(self):
-            self.name = "testTryCatch"
-            self.annotations = [MagicMock(name="Test")]
-            self.body = [MockTryStatement()]
+    test_method = MockMethodDeclaration(
+        "testTryCatch",
+        [MockAnnotation("Test")],
+        [
+            MockTryStatement(
+                [MockMethodInvocation("tryMethod", "obj")],
+                [MockCatchClause([MockMethodInvocation("catchMethod", "obj")])],
+                [MockMethodInvocation("finallyMethod", "obj")]
+            )
+        ]
+    )
 
     # Configure mock tree
-    mock_tree = MagicMock()
-    mock_tree.package = MagicMock()
-    mock_tree.package.name = "com.example.tests"
-
-    # Configure the filter method to return our mock method
-    mock_tree.filter.side_effect = lambda node_type: [("path", MockMethodDeclaration())]
+    mock_tree = MockCompilationUnit(MockPackage("com.example.tests"), [test_method])
 
     # Mock open and javalang.parse.parse
     monkeypatch.setattr("builtins.open", mock_open(read_data=""))
@@ -493,53 +507,38 @@ def test_try_catch_blocks(mock_javalang, monkeypatch):
     # Create analyzer and process a test file
     analyzer = JavaTestAnalyzer("dummy_dir")
 
-    # The method should handle try/catch blocks
-    # Note: This test might fail if the implementation doesn't handle try/catch blocks specifically
-    # In that case, we would need to modify the implementation to handle these blocks
     analyzer._process_test_file("TestTryCatch.java")
 
-    # This assertion is commented out because the current implementation might not handle try/catch blocks
-    # If it doesn't, this test serves as documentation for a potential enhancement
-    # test_methods = analyzer.test_to_methods_map["com.example.tests.TestTryCatch.testTryCatch"]
-    # assert "obj.tryMethod" in test_methods
-    # assert "obj.catchMethod" in test_methods
-    # assert "obj.finallyMethod" in test_methods
+    # Check that method calls were extracted from the try, catch and finally blocks
+    test_methods = analyzer.test_to_methods_map["com.example.tests.TestTryCatch.testTryCatch"]
+    assert "obj.tryMethod" in test_methods
+    assert "obj.catchMethod" in test_methods
+    assert "obj.finallyMethod" in test_methods
 
 def test_multiple_test_classes(mock_javalang, monkeypatch):
     """Test handling multiple test classes in a single file"""
-    # Create mock method declarations for two different classes
-    class MockMethodDeclaration:
-        def __init__(self, name, class_name, annotations=None, body=None):
-            self.name = name
-            self.class_name = class_name  # Added to track which class this method belongs to
-            self.annotations = annotations or []
-            self.body = body or []
+    # Create mock method declarations for two different classes, tracking which class each belongs to
+    @dataclass(frozen=True, slots=True)
+    class MockClassMethodDeclaration(MockMethodDeclaration):
+        class_name: str = ""
 
     # Create test methods for two different classes
-    test_method1 = MockMethodDeclaration(
+    test_method1 = MockClassMethodDeclaration(
         "testMethod1",
-        "FirstTestClass",
-        [MagicMock(name="Test")],
-        [MockMethodInvocation("method1", "instance")]
+        [MockAnnotation("Test")],
+        [MockMethodInvocation("method1", "instance")],
+        "FirstTestClass"
     )
 
-    test_method2 = MockMethodDeclaration(
+    test_method2 = MockClassMethodDeclaration(
         "testMethod2",
-        "SecondTestClass",
-        [MagicMock(name="Test")],
-        [MockMethodInvocation("method2", "instance")]
+        [MockAnnotation("Test")],
+        [MockMethodInvocation("method2", "instance")],
+        "SecondTestClass"
     )
 
-    # Configure mock tree
-    mock_tree = MagicMock()
-    mock_tree.package = MagicMock()
-    mock_tree.package.name = "com.example.tests"
-
-    # Configure the filter method to return methods from both classes
-    mock_tree.filter.side_effect = lambda node_type: [
-        ("path1", test_method1),
-        ("path2", test_method2)
-    ]
+    # Configure mock tree with methods from both classes
+    mock_tree = MockCompilationUnit(MockPackage("com.example.tests"), [test_method1, test_method2])
 
     # Mock open and javalang.parse.parse
     monkeypatch.setattr("builtins.open", mock_open(read_data=""))
@@ -575,23 +574,18 @@ def test_multiple_test_classes(mock_javalang, monkeypatch):
 def test_same_method_different_qualifiers(mock_javalang, monkeypatch):
     """Test handling test methods that call methods with the same name but different qualifiers"""
     # Create a test method that calls methods with the same name but different qualifiers
-    class MockMethodDeclaration:
-        def __init__(self):
-            self.name = "testSameMethodDifferentQualifiers"
-            self.annotations = [MagicMock(name="Test")]
-            self.body = [
-                MockMethodInvocation("getValue", "obj1"),
-                MockMethodInvocation("getValue", "obj2"),
-                MockMethodInvocation("getValue", "obj3")
-            ]
+    test_method = MockMethodDeclaration(
+        "testSameMethodDifferentQualifiers",
+        [MockAnnotation("Test")],
+        [
+            MockMethodInvocation("getValue", "obj1"),
+            MockMethodInvocation("getValue", "obj2"),
+            MockMethodInvocation("getValue", "obj3")
+        ]
+    )
 
     # Configure mock tree
-    mock_tree = MagicMock()
-    mock_tree.package = MagicMock()
-    mock_tree.package.name = "com.example.tests"
-
-    # Configure the filter method to return our mock method
-    mock_tree.filter.side_effect = lambda node_type: [("path", MockMethodDeclaration())]
+    mock_tree = MockCompilationUnit(MockPackage("com.example.tests"), [test_method])
 
     # Mock open and javalang.parse.parse
     monkeypatch.setattr("builtins.open", mock_open(read_data=""))
@@ -615,18 +609,14 @@ def test_same_method_different_qualifiers(mock_javalang, monkeypatch):
 def test_no_package_declaration(mock_javalang, monkeypatch):
     """Test handling test files with no package declaration"""
     # Create a test method
-    class MockMethodDeclaration:
-        def __init__(self):
-            self.name = "testNoPackage"
-            self.annotations = [MagicMock(name="Test")]
-            self.body = [MockMethodInvocation("method", "instance")]
+    test_method = MockMethodDeclaration(
+        "testNoPackage",
+        [MockAnnotation("Test")],
+        [MockMethodInvocation("method", "instance")]
+    )
 
     # Configure mock tree with no package
-    mock_tree = MagicMock()
-    mock_tree.package = None
-
-    # Configure the filter method to return our mock method
-    mock_tree.filter.side_effect = lambda node_type: [("path", MockMethodDeclaration())]
+    mock_tree = MockCompilationUnit(None, [test_method])
 
     # Mock open and javalang.parse.parse
     monkeypatch.setattr("builtins.open", mock_open(read_data=""))
@@ -643,28 +633,24 @@ def test_no_package_declaration(mock_javalang, monkeypatch):
     test_methods = analyzer.test_to_methods_map["TestNoPackage.testNoPackage"]
     assert "instance.method" in test_methods
 
-def test_build_test_method_mapping_with_multiple_files(monkeypatch):
+def test_build_test_method_mapping_with_multiple_files(monkeypatch, tmp_path):
     """Test building test method mapping with multiple files"""
-    # Mock os.walk to return multiple test files
-    def mock_walk(directory):
-        return [
-            ("root1", [], ["Test1.java", "NotATest.java"]),
-            ("root2", [], ["Test2.java", "Test3.java"])
-        ]
-
-    monkeypatch.setattr("os.walk", mock_walk)
-    monkeypatch.setattr("os.path.join", lambda root, file: f"{root}/{file}")
+    # Create a directory tree with multiple test files
+    for directory, files in (("root1", ["Test1.java", "NotATest.java"]), ("root2", ["Test2.java", "Test3.java"])):
+        (tmp_path / directory).mkdir()
+        for file in files:
+            (tmp_path / directory / file).write_text("")
 
     # Mock _process_test_file to track which files are processed
     processed_files = []
 
-    def mock_process_test_file(self, file_path):
-        processed_files.append(file_path)
+    def mock_process_test_file(self, file_path, stat=None):
+        processed_files.append(os.path.relpath(file_path, tmp_path).replace(os.sep, "/"))
 
     monkeypatch.setattr(JavaTestAnalyzer, "_process_test_file", mock_process_test_file)
 
     # Create analyzer and build the mapping
-    analyzer = JavaTestAnalyzer("dummy_dir")
+    analyzer = JavaTestAnalyzer(str(tmp_path))
     analyzer.build_test_method_mapping()
 
     # Check that only test files were processed
@@ -673,3 +659,207 @@ def test_build_test_method_mapping_with_multiple_files(monkeypatch):
     assert "root2/Test2.java" in processed_files
     assert "root2/Test3.java" in processed_files
     assert len(processed_files) == 3
+
+def test_scan_test_files_skips_hidden_and_linked_directories(tmp_path):
+    """Test that hidden and symlinked directories are not scanned and stats are taken on request"""
+    (tmp_path / "com").mkdir()
+    (tmp_path / "com" / "MyTest.java").write_text("class MyTest {}")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "HiddenTest.java").write_text("")
+    os.symlink(tmp_path / "com", tmp_path / "linked")
+
+    test_files = _scan_test_files(str(tmp_path), with_stat=True)
+
+    assert [os.path.relpath(path, tmp_path) for path, _ in test_files] == [os.path.join("com", "MyTest.java")]
+    assert test_files[0][1].st_size == len("class MyTest {}")
+    assert _scan_test_files(str(tmp_path), with_stat=False)[0][1] is None
+
+def test_scan_test_files_skips_build_output_directories(tmp_path):
+    """Test that build output directories are skipped only next to the build file that produces them"""
+    (tmp_path / "pom.xml").write_text("<project/>")
+    (tmp_path / "target" / "generated-test-sources").mkdir(parents=True)
+    (tmp_path / "target" / "generated-test-sources" / "GeneratedTest.java").write_text("")
+    (tmp_path / "com" / "build").mkdir(parents=True)
+    (tmp_path / "com" / "build" / "BuildTest.java").write_text("")
+
+    test_files = _scan_test_files(str(tmp_path), with_stat=False)
+
+    assert [os.path.relpath(path, tmp_path) for path, _ in test_files] == [
+        os.path.join("com", "build", "BuildTest.java")
+    ]
+
+def test_build_test_method_mapping_reuses_cached_files(tmp_path):
+    """Test that unchanged test files are not parsed again when a cache file is given"""
+    test_dir = tmp_path / "tests"
+    test_dir.mkdir()
+    test_file = test_dir / "MyClassTest.java"
+    test_file.write_text(sample_java_test_code)
+    cache_file = str(tmp_path / "cache" / "test_mapping.json")
+
+    first = JavaTestAnalyzer(str(test_dir), cache_file)
+    first.build_test_method_mapping()
+    assert "instance.method1" in first.test_to_methods_map["com.example.tests.MyClassTest.testMethod1"]
+    assert os.path.exists(cache_file)
+
+    with patch("javalang.parse.parse") as mock_parse:
+        second = JavaTestAnalyzer(str(test_dir), cache_file)
+        second.build_test_method_mapping()
+    mock_parse.assert_not_called()
+    assert second.test_to_methods_map == first.test_to_methods_map
+    assert second.method_to_tests_map == first.method_to_tests_map
+
+    # A modified file is parsed again
+    test_file.write_text(sample_java_test_code.replace("testMethod2", "testRenamed"))
+    third = JavaTestAnalyzer(str(test_dir), cache_file)
+    third.build_test_method_mapping()
+    assert "com.example.tests.MyClassTest.testRenamed" in third.test_to_methods_map
+    assert "com.example.tests.MyClassTest.testMethod2" not in third.test_to_methods_map
+
+def test_mapping_cache_is_plain_json(tmp_path):
+    """Test that the mapping cache is stored as JSON, which loading cannot run code from"""
+    test_dir = tmp_path / "tests"
+    test_dir.mkdir()
+    (test_dir / "MyClassTest.java").write_text(sample_java_test_code)
+    cache_file = tmp_path / "test_mapping.json"
+
+    JavaTestAnalyzer(str(test_dir), str(cache_file)).build_test_method_mapping()
+
+    cached = json.loads(cache_file.read_text())
+    [(path, (mtime_ns, size, tests))] = cached["files"].items()
+    assert path == str(test_dir / "MyClassTest.java")
+    assert dict(tests)["com.example.tests.MyClassTest.testMethod1"] == [
+        "instance.method1", "assertEquals", "instance.getResult"
+    ]
+
+    # A cache that is not valid JSON is ignored
+    cache_file.write_bytes(b"\x80\x04K\x01.")
+    analyzer = JavaTestAnalyzer(str(test_dir), str(cache_file))
+    analyzer.build_test_method_mapping()
+    assert "com.example.tests.MyClassTest.testMethod1" in analyzer.test_to_methods_map
+
+def test_mapping_cache_is_shared_between_test_dirs(tmp_path, monkeypatch):
+    """Test that building the mapping of one test directory keeps the cached files of another"""
+    # Resolved, as the working directory is
+    tmp_path = tmp_path.resolve()
+    for project in ("project_a", "project_b"):
+        test_dir = tmp_path / project / "src" / "test" / "java"
+        test_dir.mkdir(parents=True)
+        (test_dir / "MyClassTest.java").write_text(sample_java_test_code)
+    cache_file = str(tmp_path / "cache" / "test_mapping.json")
+
+    # Relative test directories of different projects name their files alike
+    for project in ("project_a", "project_b"):
+        monkeypatch.chdir(tmp_path / project)
+        JavaTestAnalyzer(os.path.join("src", "test", "java"), cache_file).build_test_method_mapping()
+
+    analyzer = JavaTestAnalyzer(str(tmp_path / "project_a" / "src" / "test" / "java"), cache_file)
+    analyzer._load_file_cache()
+    assert set(analyzer._file_cache) == {
+        str(tmp_path / project / "src" / "test" / "java" / "MyClassTest.java") for project in ("project_a", "project_b")
+    }
+
+    with patch("javalang.parse.parse") as mock_parse:
+        analyzer.build_test_method_mapping()
+    mock_parse.assert_not_called()
+
+def test_parallel_mapping_matches_serial(tmp_path, monkeypatch):
+    """Test that parsing test files in a process pool builds the same mappings as parsing them serially"""
+    for i in range(3):
+        (tmp_path / f"Class{i}Test.java").write_text(sample_java_test_code.replace("MyClassTest", f"Class{i}Test"))
+
+    monkeypatch.setattr("src.jade.java_test_analyzer._PARALLEL_MIN_FILES", 100)
+    serial = JavaTestAnalyzer(str(tmp_path))
+    serial.build_test_method_mapping()
+
+    monkeypatch.setattr("src.jade.java_test_analyzer._PARALLEL_MIN_FILES", 1)
+    parallel = JavaTestAnalyzer(str(tmp_path))
+    parallel.build_test_method_mapping()
+
+    assert len(parallel.test_to_methods_map) == 6
+    assert parallel.test_to_methods_map == serial.test_to_methods_map
+    assert parallel.method_to_tests_map == serial.method_to_tests_map
+
+def test_extract_method_calls_walks_whole_body():
+    """Test that calls nested in arguments, loops and try/catch blocks are all found, once each"""
+    tree = javalang.parse.parse("""
+class ExampleTest {
+    @Test
+    public void testExample() {
+        try {
+            service.handle(factory.create());
+        } catch (Exception e) {
+            log.warn(e.getMessage());
+        }
+        for (int i = 0; i < 3; i++) {
+            service.handle(null);
+        }
+    }
+}
+""")
+    _, method = next(iter(tree.filter(javalang.tree.MethodDeclaration)))
+
+    calls = JavaTestAnalyzer("dummy_dir")._extract_method_calls(method.body)
+
+    assert calls == ["service.handle", "factory.create", "log.warn", "e.getMessage"]
+
+def test_update_test_method_mapping_replaces_changed_files(tmp_path):
+    """Test that only changed test files are re-processed and their stale tests are dropped"""
+    first_file = tmp_path / "MyClassTest.java"
+    first_file.write_text(sample_java_test_code)
+    second_file = tmp_path / "OtherTest.java"
+    second_file.write_text(sample_java_test_code.replace("MyClassTest", "OtherTest"))
+
+    analyzer = JavaTestAnalyzer(str(tmp_path))
+    analyzer.build_test_method_mapping()
+    assert "com.example.tests.OtherTest.testMethod2" in analyzer.method_to_tests_map["instance.method2"]
+
+    first_file.write_text(sample_java_test_code.replace("instance.method2()", "instance.method3()"))
+    second_file.unlink()
+    with patch("javalang.parse.parse", wraps=javalang.parse.parse) as mock_parse:
+        analyzer.update_test_method_mapping([str(first_file), str(second_file), str(tmp_path / "Helper.java")])
+    mock_parse.assert_called_once()
+
+    assert "instance.method2" not in analyzer.method_to_tests_map
+    assert analyzer.method_to_tests_map["instance.method3"] == {"com.example.tests.MyClassTest.testMethod2"}
+    assert not any(test.startswith("com.example.tests.OtherTest.") for test in analyzer.test_to_methods_map)
+
+def test_load_legacy_mapping_format(tmp_path):
+    """Test that mappings saved in the older line-based format still load"""
+    mapping_file = tmp_path / "mapping.txt"
+    mapping_file.write_text("TestA.test1:\n  - ClassA.method1\n  - ClassB.method2\nTestA.test2:\n  - ClassA.method1\n")
+
+    analyzer = JavaTestAnalyzer("dummy_dir")
+    analyzer.load_mapping(str(mapping_file))
+
+    assert analyzer.test_to_methods_map == {
+        "TestA.test1": {"ClassA.method1", "ClassB.method2"},
+        "TestA.test2": {"ClassA.method1"},
+    }
+    assert analyzer.method_to_tests_map["ClassA.method1"] == {"TestA.test1", "TestA.test2"}
+
+def test_syntax_error_is_located_without_reparsing(tmp_path, caplog):
+    """Test that a malformed test file is reported from the parser's error token alone"""
+    broken_file = tmp_path / "BrokenTest.java"
+    broken_file.write_text("class BrokenTest {\n    @Test\n    public void testBroken() {\n        int x = ;\n    }\n}\n")
+
+    analyzer = JavaTestAnalyzer(str(tmp_path))
+    with patch("javalang.parse.parse", wraps=javalang.parse.parse) as mock_parse:
+        analyzer._process_test_file(str(broken_file))
+
+    mock_parse.assert_called_once()
+    assert "Parsing error at line 4, column 17" in caplog.text
+    assert analyzer.test_to_methods_map == {}
+
+def test_files_without_test_markers_are_not_parsed(tmp_path):
+    """Test that test-named helper classes without @Test or test* methods are screened out before parsing"""
+    helper_file = tmp_path / "TestSupport.java"
+    helper_file.write_text("class TestSupport {\n    static int helper() { return 1; }\n}\n")
+    test_file = tmp_path / "MyClassTest.java"
+    test_file.write_text(sample_java_test_code)
+
+    analyzer = JavaTestAnalyzer(str(tmp_path))
+    with patch("javalang.parse.parse", wraps=javalang.parse.parse) as mock_parse:
+        analyzer.build_test_method_mapping()
+
+    mock_parse.assert_called_once()
+    assert "com.example.tests.MyClassTest.testMethod1" in analyzer.test_to_methods_map
@@ -3,9 +3,16 @@ Tests for the Java Test Runner module.
 """
 
 import os
+import subprocess
 import pytest
 from unittest.mock import patch, mock_open, MagicMock, call
-from src.jade.java_test_runner import JavaTestRunner, run_impacted_tests, run_impacted_tests_from_analyzer_output
+from src.jade.java_test_runner import (
+    JavaTestRunner, _read_junit_report, run_impacted_tests, run_impacted_tests_from_analyzer_output
+)
+
+def completed_process(returncode=0, stdout="", stderr=""):
+    """Build the CompletedProcess of a build or test command."""
+    return subprocess.CompletedProcess(args=[], returncode=returncode, stdout=stdout, stderr=stderr)
 
 @pytest.fixture
 def mock_subprocess(monkeypatch):
@@ -13,10 +20,7 @@ def mock_subprocess(monkeypatch):
     mock_run = MagicMock()
 
     # Configure the mock to return a successful result by default
-    mock_process = MagicMock()
-    mock_process.stdout = "Tests run: 1, Failures: 0, Errors: 0, Skipped: 0"
-    mock_process.returncode = 0
-    mock_run.return_value = mock_process
+    mock_run.return_value = completed_process(stdout="Tests run: 1, Failures: 0, Errors: 0, Skipped: 0")
 
     monkeypatch.setattr("subprocess.run", mock_run)
     return mock_run
@@ -195,8 +199,10 @@ def test_run_impacted_tests(mock_subprocess, mock_file_exists):
 
     results = runner.run_impacted_tests(impacted_tests)
 
-    # Check that subprocess.run was called twice (once for each class)
-    assert mock_subprocess.call_count == 2
+    # Check that subprocess.run was called once for all classes
+    assert mock_subprocess.call_count == 1
+    cmd = mock_subprocess.call_args[0][0]
+    assert cmd == ["mvn", "test", "-Dtest=com.example.MyTest#testMethod1,com.example.MyTest#testMethod2,com.example.OtherTest#testMethod"]
 
     # Check the results
     assert len(results) == 3
@@ -204,6 +210,56 @@ def test_run_impacted_tests(mock_subprocess, mock_file_exists):
     assert results["com.example.MyTest.testMethod2"] is True
     assert results["com.example.OtherTest.testMethod"] is True
 
+def test_run_maven_tests_reads_surefire_reports(mock_subprocess, tmp_path):
+    """Test that per-test results come from the Surefire XML reports when available"""
+    runner = JavaTestRunner(str(tmp_path))
+
+    # Maven exits with an error as soon as one test fails
+    mock_subprocess.return_value.returncode = 1
+    mock_subprocess.return_value.stdout = "Tests run: 2, Failures: 1, Errors: 0, Skipped: 0"
+
+    def write_report(*args, **kwargs):
+        report_dir = tmp_path / "target" / "surefire-reports"
+        report_dir.mkdir(parents=True)
+        (report_dir / "TEST-com.example.MyTest.xml").write_text(
+            '<testsuite name="com.example.MyTest" tests="2" failures="1">'
+            '<testcase name="testMethod1" classname="com.example.MyTest"/>'
+            '<testcase name="testMethod2()" classname="com.example.MyTest"><failure message="boom"/></testcase>'
+            '</testsuite>'
+        )
+        return mock_subprocess.return_value
+
+    mock_subprocess.side_effect = write_report
+
+    results = runner._run_maven_tests("com.example.MyTest", ["testMethod1", "testMethod2"])
+
+    assert results == {
+        "com.example.MyTest.testMethod1": True,
+        "com.example.MyTest.testMethod2": False
+    }
+
+def test_read_junit_report_combines_invocations(tmp_path):
+    """Test that a parameterized or repeated test fails if any of its invocations fails"""
+    report_file = tmp_path / "TEST-com.example.MyTest.xml"
+    report_file.write_text(
+        '<testsuite name="com.example.MyTest" tests="5" failures="2">'
+        '<testcase name="testAdd(int)[1]" classname="com.example.MyTest"><failure message="boom"/></testcase>'
+        '<testcase name="testAdd(int)[2]" classname="com.example.MyTest"/>'
+        '<testcase name="testSub[0]" classname="com.example.MyTest"><error message="boom"/></testcase>'
+        '<testcase name="testSub[1]" classname="com.example.MyTest"/>'
+        '<testcase name="testMul[0: 2 * 3]" classname="com.example.MyTest"/>'
+        '</testsuite>'
+    )
+
+    results = {}
+    _read_junit_report(str(report_file), "com.example.MyTest", results)
+
+    assert results == {
+        "com.example.MyTest.testAdd": False,
+        "com.example.MyTest.testSub": False,
+        "com.example.MyTest.testMul": True
+    }
+
 def test_run_impacted_tests_helper(mock_subprocess, mock_file_exists):
     """Test the run_impacted_tests helper function"""
     # Configure the mock to return a successful result
@@ -303,14 +359,10 @@ def test_run_java_tests(mock_subprocess, mock_file_exists):
     runner = JavaTestRunner("/project", build_tool="java")
 
     # Configure the mock to return a successful result for compilation
-    compile_process = MagicMock()
-    compile_process.returncode = 0
-    compile_process.stdout = ""
+    compile_process = completed_process()
 
     # Configure the mock to return a successful result for test execution
-    run_process = MagicMock()
-    run_process.returncode = 0
-    run_process.stdout = "OK (1 test)"
+    run_process = completed_process(stdout="OK (1 test)")
 
     # Set up the mock to return different results for different calls
     mock_subprocess.side_effect = [compile_process, run_process]
@@ -336,38 +388,27 @@ def test_run_java_tests(mock_subprocess, mock_file_exists):
     assert "com.example.MyTest.testMethod" in results
     assert results["com.example.MyTest.testMethod"] is True
 
-    # Test with a failing test
-    mock_subprocess.reset_mock()
-
-    # Configure the mock to return a successful result for compilation
-    compile_process = MagicMock()
-    compile_process.returncode = 0
-    compile_process.stdout = ""
-
-    # Configure the mock to return a failing result for test execution
-    run_process = MagicMock()
-    run_process.returncode = 1
-    run_process.stdout = "FAILURES!!!"
-
-    # Set up the mock to return different results for different calls
-    mock_subprocess.side_effect = [compile_process, run_process]
-
-    results = runner._run_java_tests("com.example.MyTest", ["testMethod"], "/path/to/MyTest.java")
-    assert results["com.example.MyTest.testMethod"] is False
-
-    # Test with compilation failure
-    mock_subprocess.reset_mock()
+@pytest.mark.parametrize(
+    "compile_returncode, run_returncode, run_stdout",
+    [(0, 1, "FAILURES!!!"), (1, None, None)],
+    ids=["test_failure", "compile_failure"],
+)
+def test_run_java_tests_failures(mock_subprocess, mock_file_exists, compile_returncode, run_returncode, run_stdout):
+    """Test that tests are marked as failed when they fail or do not compile"""
+    runner = JavaTestRunner("/project", build_tool="java")
 
-    # Configure the mock to return a failing result for compilation
-    compile_process = MagicMock()
-    compile_process.returncode = 1
-    compile_process.stderr = "Compilation error"
+    # Configure the mock to return the compilation result
+    compile_process = completed_process(compile_returncode, stderr="Compilation error" if compile_returncode else "")
 
-    # Set up the mock to return the failing compilation result
-    mock_subprocess.side_effect = [compile_process]
+    # Set up the mock to return different results for different calls, without a run if compilation fails
+    processes = [compile_process]
+    if run_returncode is not None:
+        processes.append(completed_process(run_returncode, stdout=run_stdout))
+    mock_subprocess.side_effect = processes
 
     results = runner._run_java_tests("com.example.MyTest", ["testMethod"], "/path/to/MyTest.java")
     assert results["com.example.MyTest.testMethod"] is False
+    assert mock_subprocess.call_count == len(processes)
 
 def test_run_java_tests_exception(mock_subprocess):
     """Test handling exceptions when running Java tests"""
@@ -386,14 +427,10 @@ def test_run_impacted_tests_with_java(mock_subprocess, mock_file_exists):
     runner = JavaTestRunner("/project", build_tool="java")
 
     # Configure the mock to return a successful result for compilation
-    compile_process = MagicMock()
-    compile_process.returncode = 0
-    compile_process.stdout = ""
+    compile_process = completed_process()
 
     # Configure the mock to return a successful result for test execution
-    run_process = MagicMock()
-    run_process.returncode = 0
-    run_process.stdout = "OK (1 test)"
+    run_process = completed_process(stdout="OK (1 test)")
 
     # Set up the mock to return different results for different calls
     mock_subprocess.side_effect = [compile_process, run_process, compile_process, run_process]
@@ -410,3 +447,80 @@ def test_run_impacted_tests_with_java(mock_subprocess, mock_file_exists):
     assert len(results) == 2
     assert results["com.example.MyTest.testMethod1"] is True
     assert results["com.example.OtherTest.testMethod"] is True
+
+def test_run_java_tests_with_console_launcher(mock_subprocess, tmp_path):
+    """Test running all methods of a class in one JVM with the JUnit Console Launcher"""
+    runner = JavaTestRunner(str(tmp_path), build_tool="java", junit_console_jar="/lib/junit-console.jar")
+
+    def run(cmd, **kwargs):
+        if cmd[0] == "java":
+            reports_dir = cmd[cmd.index("--reports-dir") + 1]
+            os.makedirs(reports_dir)
+            with open(os.path.join(reports_dir, "TEST-junit-jupiter.xml"), "w") as f:
+                f.write(
+                    '<testsuite name="JUnit Jupiter">'
+                    '<testcase name="testMethod1()" classname="com.example.MyTest"/>'
+                    '<testcase name="testMethod2()" classname="com.example.MyTest"><failure/></testcase>'
+                    '</testsuite>'
+                )
+        return mock_subprocess.return_value
+
+    mock_subprocess.side_effect = run
+
+    results = runner._run_java_tests("com.example.MyTest", ["testMethod1", "testMethod2"], "/path/to/MyTest.java")
+
+    # One call to compile and one to run both methods
+    assert mock_subprocess.call_count == 2
+    run_cmd = mock_subprocess.call_args_list[1][0][0]
+    assert run_cmd[:3] == ["java", "-jar", "/lib/junit-console.jar"]
+    assert "com.example.MyTest#testMethod1" in run_cmd
+    assert "com.example.MyTest#testMethod2" in run_cmd
+
+    assert results == {
+        "com.example.MyTest.testMethod1": True,
+        "com.example.MyTest.testMethod2": False
+    }
+
+def test_compile_test_file_skips_up_to_date_classes(mock_subprocess, tmp_path):
+    """Test that a test file is not recompiled when its class file is newer"""
+    runner = JavaTestRunner(str(tmp_path), build_tool="java")
+
+    java_file = tmp_path / "MyTest.java"
+    java_file.write_text("class MyTest {}")
+    class_file = tmp_path / "classes" / "com" / "example" / "MyTest.class"
+    class_file.parent.mkdir(parents=True)
+    class_file.write_bytes(b"")
+    os.utime(java_file, (1000, 1000))
+
+    assert runner._compile_test_file(str(java_file), str(tmp_path / "classes"), str(tmp_path), "com.example.MyTest")
+    mock_subprocess.assert_not_called()
+
+    # A newer source file is compiled again
+    os.utime(java_file, None)
+    os.utime(class_file, (1000, 1000))
+    assert runner._compile_test_file(str(java_file), str(tmp_path / "classes"), str(tmp_path), "com.example.MyTest")
+    assert mock_subprocess.call_count == 1
+
+def test_class_name_to_file_path_walks_test_dir_once(monkeypatch):
+    """Test that classes outside the package layout are found with a single walk of the test directory"""
+    runner = JavaTestRunner("/project", "/test/dir")
+
+    monkeypatch.setattr("os.path.exists", lambda path: False)
+    walk = MagicMock(return_value=[
+        ("/test/dir/other", [], ["MyTest.java", "OtherTest.java", "README.md"])
+    ])
+    monkeypatch.setattr("os.walk", walk)
+
+    assert runner._class_name_to_file_path("com.example.MyTest") == os.path.join("/test/dir/other", "MyTest.java")
+    assert runner._class_name_to_file_path("com.example.OtherTest") == os.path.join("/test/dir/other", "OtherTest.java")
+    assert runner._class_name_to_file_path("com.example.Missing") is None
+    assert walk.call_count == 1
+
+def test_run_maven_tests_in_process(mock_subprocess):
+    """Test that Maven tests run in the Maven JVM when requested"""
+    runner = JavaTestRunner("/project", in_process=True)
+
+    runner._run_maven_tests("com.example.MyTest", ["testMethod"])
+
+    args, kwargs = mock_subprocess.call_args
+    assert args[0] == ["mvn", "test", "-Dtest=com.example.MyTest#testMethod", "-DforkCount=0"]